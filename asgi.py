@@ -0,0 +1,181 @@
+#----------------------------------------------------------------------------#
+# ASGI entry point with asyncio database access for the read routes.
+#
+#   uvicorn asgi:application --workers 2
+#
+# The listing, detail and search routes in ASYNC_ENDPOINTS run the ordinary
+# Flask views from views/ inside AsyncSession.run_sync: db.session is bound
+# to the async session's sync facade for the duration of the request, so the
+# views, query functions, models, page cache and templates are all shared
+# with the WSGI app, while every database round trip awaits the async driver
+# and releases the event loop to other requests. Everything else (forms,
+# writes, /metrics, static files) is handed to the WSGI app on a thread.
+#
+# Needs greenlet and an async driver: aiosqlite for SQLite, asyncpg for
+# Postgres. The async URL is derived from the first of
+# SQLALCHEMY_REPLICA_URIS, or else SQLALCHEMY_DATABASE_URI, unless
+# ASYNC_DATABASE_URI is set; clients kept on the primary after a write (see
+# replicas.py) are served by the WSGI app. Streamed listings (?all=1) are
+# rendered in full before sending.
+#----------------------------------------------------------------------------#
+
+import asyncio
+import io
+import sys
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from werkzeug.exceptions import HTTPException
+
+import config
+from app import app
+from extensions import replicas
+from models import db
+from warmup import warm_on_start
+
+ASYNC_ENDPOINTS = frozenset((
+    'venues.venues', 'venues.search_venues', 'venues.show_venue',
+    'artists.artists', 'artists.search_artists', 'artists.show_artist',
+    'shows.shows',
+    'api.api_venues', 'api.api_search_venues', 'api.api_venue',
+    'api.api_artists', 'api.api_search_artists', 'api.api_artist',
+    'api.api_shows',
+))
+ASYNC_DRIVERS = (
+    ('postgresql+psycopg2:', 'postgresql+asyncpg:'),
+    ('postgresql:', 'postgresql+asyncpg:'),
+    ('postgres:', 'postgresql+asyncpg:'),
+    ('sqlite:', 'sqlite+aiosqlite:'),
+)
+
+
+def async_uri(uri):
+    for sync, async_ in ASYNC_DRIVERS:
+        if uri.startswith(sync):
+            return async_ + uri[len(sync):]
+    return uri
+
+
+def wsgi_environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf8').decode('latin1'),
+        'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope['query_string'].decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/%s' % scope['http_version'],
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin1').upper().replace('-', '_')
+        value = value.decode('latin1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[name] = value
+        else:
+            key = 'HTTP_' + name
+            environ[key] = environ[key] + ',' + value if key in environ else value
+    return environ
+
+
+class AsyncApp(object):
+
+    def __init__(self, flask_app, db, uri=None):
+        self.app = flask_app
+        self.db = db
+        sync_uri = (flask_app.config.get('SQLALCHEMY_REPLICA_URIS') or
+                    [flask_app.config['SQLALCHEMY_DATABASE_URI']])[0]
+        uri = uri or flask_app.config.get('ASYNC_DATABASE_URI') or async_uri(sync_uri)
+        self.engine = create_async_engine(uri, **config.engine_options(uri))
+        self.sessions = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+        body = b''
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+        environ = wsgi_environ(scope, body)
+        if self.is_async(environ):
+            async with self.sessions() as session:
+                status, headers, chunks = await session.run_sync(self.dispatch, environ)
+        else:
+            loop = asyncio.get_running_loop()
+            status, headers, chunks = await loop.run_in_executor(None, self.call_wsgi, environ)
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(k.lower().encode('latin1'), v.encode('latin1')) for k, v in headers],
+        })
+        await send({'type': 'http.response.body', 'body': b''.join(chunks)})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await asyncio.get_running_loop().run_in_executor(None, warm_on_start, self.app)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def is_async(self, environ):
+        try:
+            endpoint, args = self.app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            return False
+        return endpoint in ASYNC_ENDPOINTS and not replicas.sticky_environ(environ)
+
+    def dispatch(self, session, environ):
+        # Runs in run_sync's greenlet: what wsgi_app does, with db.session
+        # pointing at `session` and the body consumed before returning.
+        ctx = self.app.request_context(environ)
+        error = None
+        try:
+            ctx.push()
+            self.db.session.registry.set(session)
+            try:
+                response = self.app.full_dispatch_request()
+            except Exception as e:
+                error = e
+                response = self.app.handle_exception(e)
+            app_iter, status, headers = response.get_wsgi_response(environ)
+            try:
+                chunks = list(app_iter)
+            finally:
+                if hasattr(app_iter, 'close'):
+                    app_iter.close()
+            return int(status.split(None, 1)[0]), list(headers), chunks
+        finally:
+            self.db.session.registry.clear()
+            ctx.pop(error)
+
+    def call_wsgi(self, environ):
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(None, 1)[0])
+            started['headers'] = headers
+
+        app_iter = self.app.wsgi_app(environ, start_response)
+        try:
+            chunks = list(app_iter)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+        return started['status'], started['headers'], chunks
+
+
+application = AsyncApp(app, db)
@@ -0,0 +1,89 @@
+#----------------------------------------------------------------------------#
+# Throughput of the read routes served sync (gunicorn, app:app) versus async
+# (uvicorn, asgi:application) at increasing client concurrency.
+#
+# Both servers are started here on the configured database with the same
+# number of worker processes; each concurrency level is a closed loop of
+# --requests requests over the URL mix of benchmarks/routes.py restricted to
+# the routes asgi.py serves asynchronously. The page cache is switched off
+# in the servers (PAGE_CACHE_ENABLED is read from FYYUR_PAGE_CACHE).
+#
+#   DATABASE_URL=postgresql://... python benchmarks/async_serving.py --concurrency 8 64 256
+#----------------------------------------------------------------------------#
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import replay
+import routes
+from asgi import ASYNC_ENDPOINTS
+
+SERVERS = {
+    'sync': [sys.executable, '-m', 'gunicorn', '--workers', '{workers}', '--threads', '1',
+             '--bind', '127.0.0.1:{port}', '--log-level', 'warning', 'app:app'],
+    'async': [sys.executable, '-m', 'uvicorn', '--workers', '{workers}',
+              '--port', '{port}', '--log-level', 'warning', 'asgi:application'],
+}
+
+
+def wait_until_up(url, process, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit('server exited with %d' % process.returncode)
+        try:
+            urllib.request.urlopen(url).read()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise SystemExit('server did not come up at %s' % url)
+
+
+def records():
+    with routes.app.app_context():
+        return [{'method': method, 'path': url, 'form': form}
+                for endpoint, method, url, form in routes.cases() if endpoint in ASYNC_ENDPOINTS]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sync versus async serving of the read routes.')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[8, 64, 256])
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per concurrency level.')
+    parser.add_argument('--workers', type=int, default=2, help='Server worker processes.')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--mode', choices=sorted(SERVERS), nargs='+', default=sorted(SERVERS, reverse=True))
+    args = parser.parse_args()
+
+    mix = records()
+    load = [mix[i % len(mix)] for i in range(args.requests)]
+    env = dict(os.environ, FYYUR_PAGE_CACHE='0')
+    print('%-6s %6s %10s %9s %9s %9s %7s' % ('mode', 'conc', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'errors'))
+    for mode in args.mode:
+        command = [part.format(workers=args.workers, port=args.port) for part in SERVERS[mode]]
+        process = subprocess.Popen(command, cwd=routes.ROOT, env=env)
+        try:
+            base_url = 'http://127.0.0.1:%d' % args.port
+            wait_until_up(base_url + '/', process)
+            target = replay.HttpTarget(base_url)
+            replay.replay(target, mix * 2, replay.schedule(mix * 2), 4)
+            for concurrency in args.concurrency:
+                latencies, statuses, elapsed = replay.replay(
+                    target, load, replay.schedule(load), concurrency)
+                errors = sum(n for status, n in statuses.items() if status != 200)
+                print('%-6s %6d %10.1f %9.2f %9.2f %9.2f %7d' % (
+                    mode, concurrency, len(latencies) / elapsed,
+                    replay.percentile(latencies, 50) * 1e3, replay.percentile(latencies, 95) * 1e3,
+                    replay.percentile(latencies, 99) * 1e3, errors))
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+#----------------------------------------------------------------------------#
+# Per-call cost of the `datetime` Jinja filter, before and after it took
+# native datetimes and cached its compiled babel patterns.
+#
+#   python benchmarks/datetime_filter.py [--number 20000]
+#----------------------------------------------------------------------------#
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime
+
+import babel.dates
+import dateutil.parser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from filters import format_datetime
+
+
+def format_datetime_legacy(value, format='medium'):
+    # The filter as it was: stringified date in, full parse and babel
+    # pattern compilation on every call.
+    date = dateutil.parser.parse(value)
+    if format == 'full':
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == 'medium':
+        format = "EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(date, format)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-call cost of the datetime filter.')
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args()
+
+    value = datetime(2021, 5, 10, 13, 0)
+    # Same output as before for the repo's formats, babel's named ones and
+    # a plain pattern.
+    for format in ('full', 'medium', 'short', 'long', 'yyyy-MM-dd HH:mm'):
+        assert format_datetime(value, format) == format_datetime_legacy(str(value), format), format
+    assert format_datetime(value, 'short', 'de_DE') == '10.05.21, 13:00'
+
+    cases = [
+        ('legacy, str input', lambda: format_datetime_legacy(str(value), 'full')),
+        ('current, str input', lambda: format_datetime(str(value), 'full')),
+        ('current, datetime input', lambda: format_datetime(value, 'full')),
+    ]
+    baseline = None
+    for name, call in cases:
+        per_call = min(timeit.repeat(call, number=args.number, repeat=3)) / args.number
+        baseline = baseline or per_call
+        print('%-26s %8.2f us/call  %5.1fx' % (name, per_call * 1e6, baseline / per_call))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#----------------------------------------------------------------------------#
+# Cold-start import cost of a web worker and of the CLI, from
+# `python -X importtime`.
+#
+# Each scenario runs in a fresh interpreter --runs times (after one warm-up
+# run that fills __pycache__); the report gives the median total import time,
+# the median wall time of the whole process, and the packages that cost the
+# most. With --compare REV the same scenarios run against a checkout
+# of that git revision (via `git archive`) for a before/after view.
+#
+#   DATABASE_URL=sqlite:////tmp/fyyur.db python benchmarks/importtime.py --compare HEAD~1
+#----------------------------------------------------------------------------#
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+SCENARIOS = (
+    # (name, python arguments)
+    ('worker', ['-c', 'import app']),
+    ('cli', ['-m', 'flask', '--app', 'app', 'routes']),
+    ('cli db', ['-m', 'flask', '--app', 'app', 'db', '--help']),
+)
+
+
+def parse(stderr):
+    """{module: (self us, cumulative us, depth)} from -X importtime output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(own), int(cumulative), depth)
+    return modules
+
+
+def run(cwd, arguments):
+    env = dict(os.environ, PYTHONPATH=cwd, FLASK_DEBUG='0')
+    started = time.perf_counter()
+    process = subprocess.run([sys.executable, '-X', 'importtime'] + arguments,
+                             cwd=cwd, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if process.returncode != 0:
+        raise SystemExit('%s failed in %s:\n%s' % (' '.join(arguments), cwd, process.stderr[-2000:]))
+    return parse(process.stderr), wall
+
+
+def measure(cwd, arguments, runs):
+    run(cwd, arguments)
+    samples = [run(cwd, arguments) for _ in range(runs)]
+    totals = [sum(own for own, cumulative, depth in modules.values()) for modules, wall in samples]
+    modules = samples[totals.index(sorted(totals)[len(totals) // 2])][0]
+    return {
+        'import_ms': statistics.median(totals) / 1e3,
+        'wall_ms': statistics.median(wall for modules, wall in samples) * 1e3,
+        'modules': modules,
+    }
+
+
+def top(modules, limit):
+    # Self time summed per top-level package: where the import time goes.
+    packages = {}
+    for name, (own, cumulative, depth) in modules.items():
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + own
+    return sorted(((us, package) for package, us in packages.items()), reverse=True)[:limit]
+
+
+def checkout(rev):
+    directory = tempfile.mkdtemp(prefix='importtime-')
+    archive = subprocess.run(['git', 'archive', rev], cwd=ROOT, capture_output=True, check=True)
+    subprocess.run(['tar', '-x', '-C', directory], input=archive.stdout, check=True)
+    return directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import-time report for workers and CLI commands.')
+    parser.add_argument('--runs', type=int, default=5, help='Interpreter starts per scenario.')
+    parser.add_argument('--top', type=int, default=10, help='Packages listed per scenario.')
+    parser.add_argument('--compare', metavar='REV', help='Also measure this git revision.')
+    args = parser.parse_args()
+
+    trees = [('current', os.path.abspath(ROOT))]
+    if args.compare:
+        trees.insert(0, (args.compare, checkout(args.compare)))
+    try:
+        results = dict(((label, name), measure(cwd, arguments, args.runs))
+                       for label, cwd in trees for name, arguments in SCENARIOS)
+    finally:
+        if args.compare:
+            shutil.rmtree(trees[0][1])
+
+    print('%-8s %-10s %12s %12s' % ('scenario', 'tree', 'imports ms', 'process ms'))
+    for name, arguments in SCENARIOS:
+        for label, cwd in trees:
+            result = results[(label, name)]
+            print('%-8s %-10s %12.1f %12.1f' % (name, label[:10], result['import_ms'], result['wall_ms']))
+    for name, arguments in SCENARIOS:
+        for label, cwd in trees:
+            print('\n%s (%s), import ms by package:' % (name, label))
+            for us, package in top(results[(label, name)]['modules'], args.top):
+                print('  %8.1f  %s' % (us / 1e3, package))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+#----------------------------------------------------------------------------#
+# Replay a captured request log (see request_log.py) against the app.
+#
+# Requests go to a running server with --url, or in-process through the
+# Flask test client otherwise. Pacing is one of:
+#
+#   --rate 200     fixed arrival rate, requests per second
+#   --speed 2      the recorded arrival times, twice as fast
+#   (neither)      as fast as --concurrency workers allow
+#
+# When paced, latency is measured from each request's scheduled start, so
+# time spent waiting for a free worker counts against it rather than
+# silently lowering the offered load. By default only reads are replayed
+# (GET, and the POST search forms); --writes replays everything.
+#
+#   FYYUR_REQUEST_LOG=logs/requests.jsonl python3 app.py     # capture
+#   python benchmarks/replay.py logs/requests.jsonl --concurrency 8 --rate 100
+#----------------------------------------------------------------------------#
+
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def read_log(path, writes=False, limit=None):
+    records = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            is_read = record['method'] in ('GET', 'HEAD') or record['path'].split('?')[0].endswith('/search')
+            if writes or is_read:
+                records.append(record)
+            if limit and len(records) >= limit:
+                break
+    return records
+
+
+def schedule(records, rate=None, speed=None):
+    """Offsets in seconds from the start of the run, or None when unpaced."""
+    if rate:
+        return [i / rate for i in range(len(records))]
+    if speed:
+        first = records[0]['ts']
+        return [(record['ts'] - first) / speed for record in records]
+    return [None] * len(records)
+
+
+class HttpTarget(object):
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def send(self, record):
+        data = None
+        if record.get('form'):
+            data = urllib.parse.urlencode(record['form'], doseq=True).encode()
+        req = urllib.request.Request(self.base_url + record['path'], data=data, method=record['method'])
+        try:
+            with urllib.request.urlopen(req) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+class AppTarget(object):
+    # One test client per worker thread; the app itself is shared.
+
+    def __init__(self):
+        sys.path.insert(0, ROOT)
+        from app import app
+        self.app = app
+        self.local = threading.local()
+
+    def send(self, record):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        response = client.open(record['path'], method=record['method'], data=record.get('form') or None)
+        response.get_data()
+        return response.status_code
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(p / 100.0 * len(sorted_values)) - 1))]
+
+
+def replay(target, records, offsets, concurrency):
+    latencies, statuses, lock = [], Counter(), threading.Lock()
+
+    def run(record, due):
+        started = time.perf_counter()
+        try:
+            status = target.send(record)
+        except Exception as e:
+            status = type(e).__name__
+        finished = time.perf_counter()
+        with lock:
+            latencies.append(finished - (due if due is not None else started))
+            statuses[status] += 1
+
+    begin = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for record, offset in zip(records, offsets):
+            due = None
+            if offset is not None:
+                due = begin + offset
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(run, record, due)
+    elapsed = time.perf_counter() - begin
+    return sorted(latencies), statuses, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a captured request log.')
+    parser.add_argument('log', help='JSONL file written by REQUEST_LOG_PATH.')
+    parser.add_argument('--url', help='Base URL of a running server; in-process when omitted.')
+    parser.add_argument('--concurrency', type=int, default=4)
+    pacing = parser.add_mutually_exclusive_group()
+    pacing.add_argument('--rate', type=float, help='Fixed arrival rate in requests per second.')
+    pacing.add_argument('--speed', type=float, help='Recorded arrival times, sped up by this factor.')
+    parser.add_argument('--limit', type=int, help='Replay at most this many requests.')
+    parser.add_argument('--writes', action='store_true', help='Also replay creates, edits and deletes.')
+    parser.add_argument('--json', dest='json_out', help='Write the summary to this file as JSON.')
+    args = parser.parse_args()
+
+    records = read_log(args.log, args.writes, args.limit)
+    if not records:
+        raise SystemExit('nothing to replay in %s' % args.log)
+    target = HttpTarget(args.url) if args.url else AppTarget()
+    latencies, statuses, elapsed = replay(
+        target, records, schedule(records, args.rate, args.speed), args.concurrency)
+
+    errors = sum(n for status, n in statuses.items() if not isinstance(status, int) or status >= 500)
+    summary = {
+        'requests': len(latencies),
+        'seconds': elapsed,
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'errors': errors,
+        'statuses': dict((str(status), n) for status, n in statuses.items()),
+        'p50_ms': percentile(latencies, 50) * 1e3,
+        'p95_ms': percentile(latencies, 95) * 1e3,
+        'p99_ms': percentile(latencies, 99) * 1e3,
+        'max_ms': (latencies[-1] if latencies else 0.0) * 1e3,
+    }
+    print('%d requests in %.2fs: %.1f req/s, %d errors' % (
+        summary['requests'], summary['seconds'], summary['throughput'], errors))
+    print('status   %s' % ', '.join('%s: %d' % item for item in sorted(summary['statuses'].items())))
+    print('latency  p50 %.2f ms  p95 %.2f ms  p99 %.2f ms  max %.2f ms' % (
+        summary['p50_ms'], summary['p95_ms'], summary['p99_ms'], summary['max_ms']))
+    if args.json_out:
+        with open(args.json_out, 'w') as f:
+            json.dump(summary, f, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
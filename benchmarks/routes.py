@@ -0,0 +1,202 @@
+#----------------------------------------------------------------------------#
+# Latency of every read route in app.py through the Flask test client.
+#
+# Runs against the configured database (DATABASE_URL), typically one filled
+# by `flask generate`. Detail routes use the venue and artist with the most
+# shows, the worst case for those pages. The page cache is off unless
+# --cache is given, so the numbers measure queries and rendering. --memory
+# adds a pass under tracemalloc reporting the median peak of Python memory
+# allocated while serving one request.
+#
+# Each run is appended to benchmarks/results/routes.jsonl with the commit it
+# was taken at; --compare prints the change against the latest earlier run
+# on the same dialect and row counts.
+#
+#   DATABASE_URL=sqlite:////tmp/fyyur-100k.db python benchmarks/routes.py --compare
+#----------------------------------------------------------------------------#
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+from flask import url_for
+from sqlalchemy import func, select
+
+from app import app
+from extensions import page_cache
+from models import db, Venue, Artist, Show
+from querybudget import QueryRecorder
+
+RESULTS = os.path.join(ROOT, 'benchmarks', 'results', 'routes.jsonl')
+SKIP = ('static', 'metrics')
+SEARCH_FORMS = {
+    'venues.search_venues': {'search_term': 'hall'},
+    'artists.search_artists': {'search_term': 'fox'},
+}
+SEARCH_ARGS = {
+    'api.api_search_venues': {'search_term': 'hall'},
+    'api.api_search_artists': {'search_term': 'fox'},
+}
+
+
+def busiest(column):
+    return db.session.execute(
+        select(column).group_by(column).order_by(func.count().desc(), column).limit(1)).scalar()
+
+
+def cases():
+    """(endpoint, method, url, form) for every read route."""
+    ids = {'venue_id': busiest(Show.venue_id) or 1, 'artist_id': busiest(Show.artist_id) or 1}
+    found = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if rule.endpoint in SKIP:
+            continue
+        if rule.endpoint in SEARCH_FORMS:
+            method, form = 'POST', SEARCH_FORMS[rule.endpoint]
+        elif 'GET' in rule.methods:
+            method, form = 'GET', None
+        else:
+            continue
+        with app.test_request_context():
+            url = url_for(rule.endpoint, **dict((name, ids[name]) for name in rule.arguments))
+        if rule.endpoint in SEARCH_ARGS:
+            url += '?' + '&'.join('%s=%s' % item for item in SEARCH_ARGS[rule.endpoint].items())
+        found.append((rule.endpoint, method, url, form))
+    return found
+
+
+def measure(client, method, url, form, requests, warmup):
+    for _ in range(warmup):
+        client.open(url, method=method, data=form)
+    timings, statements, size = [], 0, 0
+    for _ in range(requests):
+        with QueryRecorder() as recorder:
+            started = time.perf_counter()
+            response = client.open(url, method=method, data=form)
+            body = response.get_data()
+            timings.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise SystemExit('%s %s returned %d' % (method, url, response.status_code))
+        statements = len(recorder.statements)
+        size = len(body)
+    timings.sort()
+    return {
+        'median_ms': statistics.median(timings) * 1e3,
+        'p95_ms': timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1e3,
+        'statements': statements,
+        'bytes': size,
+    }
+
+
+def peak_memory(client, method, url, form, requests):
+    # Median over `requests` of the traced memory peak above the level at the
+    # start of the request, in KiB.
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(requests):
+            start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            client.open(url, method=method, data=form).get_data()
+            peaks.append(tracemalloc.get_traced_memory()[1] - start)
+    finally:
+        tracemalloc.stop()
+    return statistics.median(peaks) / 1024
+
+
+def git_commit():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+        dirty = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                        cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('-dirty' if dirty else '')
+
+
+def dataset():
+    return {
+        'dialect': db.engine.dialect.name,
+        'venues': db.session.execute(select(func.count(Venue.id))).scalar(),
+        'artists': db.session.execute(select(func.count(Artist.id))).scalar(),
+        'shows': db.session.execute(select(func.count(Show.id))).scalar(),
+    }
+
+
+def previous_run(path, data, commit):
+    if not os.path.exists(path):
+        return None
+    found = None
+    with open(path) as f:
+        for line in f:
+            run = json.loads(line)
+            if run['dataset'] == data and run['commit'] != commit:
+                found = run
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latency of every read route.')
+    parser.add_argument('--requests', type=int, default=20, help='Timed requests per route.')
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--cache', action='store_true', help='Leave the page cache on.')
+    parser.add_argument('--results', default=RESULTS, help='JSONL file the run is appended to.')
+    parser.add_argument('--no-record', action='store_true', help="Don't append this run.")
+    parser.add_argument('--compare', action='store_true', help='Show the change against the last run.')
+    parser.add_argument('--memory', action='store_true', help='Also measure peak memory per request.')
+    args = parser.parse_args()
+
+    page_cache.enabled = args.cache
+    app.config['QUERY_BUDGET_MODE'] = None
+    client = app.test_client()
+    with app.app_context():
+        data = dataset()
+        routes = cases()
+    commit = git_commit()
+    baseline = previous_run(args.results, data, commit) if args.compare else None
+
+    print('%s: %d venues, %d artists, %d shows; commit %s' % (
+        data['dialect'], data['venues'], data['artists'], data['shows'], commit))
+    if baseline:
+        print('compared with %s (%s)' % (baseline['commit'], baseline['timestamp']))
+    results = {}
+    for endpoint, method, url, form in routes:
+        result = measure(client, method, url, form, args.requests, args.warmup)
+        memory = ''
+        if args.memory:
+            result['peak_kib'] = peak_memory(client, method, url, form, args.requests)
+            memory = '%8.1f KiB' % result['peak_kib']
+        results[endpoint] = dict(result, method=method, url=url)
+        change = ''
+        before = baseline and baseline['routes'].get(endpoint)
+        if before:
+            change = '%+6.1f%%' % ((result['median_ms'] / before['median_ms'] - 1) * 100)
+            if 'peak_kib' in result and 'peak_kib' in before:
+                change += ' mem %+6.1f%%' % ((result['peak_kib'] / before['peak_kib'] - 1) * 100)
+        print('%-26s %-4s %-32s %8.2f ms  p95 %8.2f ms  %3d sql  %9d B %s %s' % (
+            endpoint, method, url[:32], result['median_ms'], result['p95_ms'],
+            result['statements'], result['bytes'], memory, change))
+
+    if not args.no_record:
+        os.makedirs(os.path.dirname(args.results), exist_ok=True)
+        with open(args.results, 'a') as f:
+            f.write(json.dumps({
+                'commit': commit,
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'dataset': data,
+                'requests': args.requests,
+                'cache': args.cache,
+                'routes': results,
+            }, sort_keys=True) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+#----------------------------------------------------------------------------#
+# Rendered-page cache.
+#
+# GET pages are cached by path and query string. Every entry is also keyed by
+# the current token of each of its tags ('venues', 'venue:3', ...); a write
+# invalidates a tag by replacing its token, which orphans exactly the pages
+# carrying that tag. This works the same on an in-process LRU and on a shared
+# backend, since nothing has to enumerate keys.
+#----------------------------------------------------------------------------#
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request, session
+from werkzeug.utils import import_string
+
+
+class MemoryBackend(object):
+    """Thread-safe in-process LRU with per-entry TTL."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend(object):
+    """Shared backend; needs the optional `redis` package."""
+
+    def __init__(self, url='redis://localhost:6379/0', prefix='fyyur:'):
+        import redis
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+class PageCache(object):
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.enabled = False
+        self.ttl = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('PAGE_CACHE_ENABLED', True)
+        self.ttl = app.config.get('PAGE_CACHE_TTL', 60)
+        backend = app.config.get('PAGE_CACHE_BACKEND', MemoryBackend)
+        if isinstance(backend, str):
+            backend = import_string(backend)
+        self.backend = backend(**app.config.get('PAGE_CACHE_OPTIONS', {}))
+        app.extensions['page_cache'] = self
+
+    def _token(self, tag):
+        token = self.backend.get('tag:' + tag)
+        if token is None:
+            token = uuid.uuid4().hex
+            self.backend.set('tag:' + tag, token)
+        return token
+
+    def key(self, tags):
+        query = request.query_string.decode()
+        tokens = ','.join(self._token(tag) for tag in tags)
+        return 'page:%s?%s|%s' % (request.path, query, tokens)
+
+    def cached(self, *tags):
+        """Cache the rendered GET response of a view under `tags`.
+
+        Tags may use the view arguments as format fields, e.g. 'venue:{venue_id}'.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                # Pages carrying flashed messages are specific to one session,
+                # and a client that just wrote reads the primary (replicas.py),
+                # never pages other clients filled from a lagging replica.
+                if not self.enabled or request.method != 'GET' or session.get('_flashes') \
+                        or self.sticky():
+                    return view(*args, **kwargs)
+                key = self.key([tag.format(**kwargs) for tag in tags])
+                body = self.backend.get(key)
+                if body is not None:
+                    self.hits += 1
+                    return body
+                self.misses += 1
+                body = view(*args, **kwargs)
+                if isinstance(body, str):
+                    self.backend.set(key, body, self.ttl)
+                return body
+            return wrapper
+        return decorator
+
+    def sticky(self):
+        replicas = current_app.extensions.get('replicas')
+        return replicas is not None and bool(replicas.engines) and replicas.sticky(request.cookies)
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            self.backend.set('tag:' + tag, uuid.uuid4().hex)
+        self.invalidations += len(tags)
+
+    def clear(self):
+        self.backend.clear()
+
+    @property
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+        }
@@ -0,0 +1,88 @@
+#----------------------------------------------------------------------------#
+# Checks the keyset pagination of the venue and artist listings on a local
+# SQLite file holding rows whose ordering keys (name, city, state) are NULL.
+#
+# Following the `next` links page by page, and then the `prev` links back,
+# must visit every row exactly once and in the same order as the complete
+# listing.
+#
+#   python check_pagination.py [--db /tmp/fyyur-pagination.db]
+#----------------------------------------------------------------------------#
+
+import argparse
+import os
+import sys
+import tempfile
+
+PER_PAGE = 2
+
+
+def setup(path):
+    # Before config.py is first imported: the app reads these at import.
+    if os.path.exists(path):
+        os.remove(path)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + path
+    os.environ['FYYUR_PAGE_CACHE'] = '0'
+
+
+def main():
+    from app import app
+    from models import db, Venue, Artist
+
+    names = [None, 'Alpha', None, 'Beta', '', 'Gamma', None]
+    areas = [(None, None), ('San Francisco', 'CA'), (None, 'NY'), ('San Francisco', None)]
+    with app.app_context():
+        db.create_all()
+        for i, name in enumerate(names):
+            city, state = areas[i % len(areas)]
+            db.session.add(Venue(name=name, city=city, state=state))
+            db.session.add(Artist(name=name))
+        db.session.commit()
+        ids = {model: sorted(r.id for r in model.query.all()) for model in (Venue, Artist)}
+
+    client = app.test_client()
+
+    def pages(url, items):
+        # Ids of every page from `url` on, following `next` and then back `prev`.
+        forward, backward = [], []
+        while url:
+            body = client.get(url).get_json()
+            forward.append(items(body))
+            last, url = url, body['next']
+        url = client.get(last).get_json()['prev']
+        while url:
+            body = client.get(url).get_json()
+            backward.insert(0, items(body))
+            url = body['prev']
+        return forward, backward
+
+    def venue_ids(body):
+        return [v['id'] for area in body['areas'] for v in area['venues']]
+
+    def artist_ids(body):
+        return [a['id'] for a in body['artists']]
+
+    def check(model, url, items):
+        listing = items(client.get(url + '?per_page=%d' % len(names)).get_json())
+        forward, backward = pages(url + '?per_page=%d' % PER_PAGE, items)
+        flat = [i for page in forward for i in page]
+        return sorted(listing) == ids[model] and flat == listing and backward == forward[:-1]
+
+    checks = [
+        ('venue pages reach every venue in order', lambda: check(Venue, '/api/v1/venues', venue_ids)),
+        ('artist pages reach every artist in order', lambda: check(Artist, '/api/v1/artists', artist_ids)),
+    ]
+    failed = 0
+    for label, check_ in checks:
+        ok = check_()
+        failed += not ok
+        print('%-4s %s' % ('ok' if ok else 'FAIL', label))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check keyset pagination over NULL ordering keys.')
+    parser.add_argument('--db', default=None, help='SQLite file to create (default: a temporary file).')
+    args = parser.parse_args()
+    setup(args.db or os.path.join(tempfile.mkdtemp(prefix='fyyur-pagination-'), 'fyyur.db'))
+    sys.exit(main())
@@ -0,0 +1,63 @@
+#----------------------------------------------------------------------------#
+# Checks the partition layout of migration d7e3f1a95b62 (partition_show).
+#
+# bounds() must cover the years from the first show up to the current one
+# yearly, then the months up to SHOW_PARTITIONS_AHEAD past now, without gaps
+# or overlaps, and no further: shows beyond that go to Show_after, however
+# far out they are dated.
+#
+#   python check_partition_bounds.py
+#----------------------------------------------------------------------------#
+
+import importlib.util
+import os
+import sys
+from datetime import datetime
+
+MIGRATION = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         'migrations', 'versions', 'd7e3f1a95b62_partition_show.py')
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location('partition_show', MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main():
+    migration = load_migration()
+    bounds, ahead = migration.bounds, migration.AHEAD
+    now = datetime(2026, 12, 18, 21, 14)
+    until = datetime(2027, 1 + ahead, 1)
+
+    def contiguous(ranges):
+        return all(a[2] == b[1] for a, b in zip(ranges, ranges[1:]))
+
+    def layout(first):
+        ranges = bounds(first, now)
+        names = [name for name, start, end in ranges]
+        return ranges, names
+
+    ranges, names = layout(datetime(2019, 5, 3))
+    checks = [
+        ('years before now\'s are yearly', names[:7] == ['Show_%d' % y for y in range(2019, 2026)]),
+        ('months run from January to AHEAD past now',
+         names[7:] == ['Show_2026_%02d' % m for m in range(1, 13)] +
+                      ['Show_2027_%02d' % m for m in range(1, ahead + 1)]),
+        ('the partitions are contiguous', contiguous(ranges)),
+        ('the last partition ends AHEAD months past now', ranges[-1][2] == until),
+    ]
+    ranges, names = layout(datetime(2099, 12, 31))
+    checks.append(('a first show far in the future adds no partitions',
+                   ranges[0][1] == datetime(2026, 1, 1) and ranges[-1][2] == until
+                   and len(ranges) == 12 + ahead))
+    failed = 0
+    for label, ok in checks:
+        failed += not ok
+        print('%-4s %s' % ('ok' if ok else 'FAIL', label))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#----------------------------------------------------------------------------#
+# Checks the read-replica routing of replicas.py on two local SQLite files.
+#
+# The "replica" is a separate database that never receives the writes, so
+# which one answered is visible in the response: reads must come from the
+# replica, a write must land on the primary, and the writing client must
+# then read the primary until its sticky window ends. The page cache stays on,
+# as in production, so a sticky client must also bypass pages cached from the
+# replica. /metrics must report the connection pool of both databases.
+#
+#   python check_replicas.py [--dir /tmp/fyyur-replicas]
+#----------------------------------------------------------------------------#
+
+import argparse
+import os
+import sys
+import tempfile
+
+
+def setup(directory):
+    # Before config.py is first imported: the app reads these at import.
+    os.makedirs(directory, exist_ok=True)
+    primary = os.path.join(directory, 'primary.db')
+    replica = os.path.join(directory, 'replica.db')
+    for path in (primary, replica):
+        if os.path.exists(path):
+            os.remove(path)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + primary
+    os.environ['FYYUR_REPLICA_URLS'] = 'sqlite:///' + replica
+    os.environ['FYYUR_PAGE_CACHE'] = '1'
+
+
+def main():
+    from app import app
+    from extensions import replicas
+    from models import db, Venue
+    from replicas import STICKY_COOKIE
+
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(replicas.engines[0])
+        with replicas.engines[0].begin() as conn:
+            conn.execute(Venue.__table__.insert().values(
+                name='Replica Hall', city='San Francisco', state='CA'))
+
+    def venue_names(client):
+        areas = client.get('/api/v1/venues').get_json()['areas']
+        return sorted(v['name'] for area in areas for v in area['venues'])
+
+    writer, reader = app.test_client(), app.test_client()
+    checks = [('reads go to the replica', lambda: venue_names(reader) == ['Replica Hall'])]
+
+    def write():
+        response = writer.post('/venues/create', data={
+            'name': 'Primary Hall', 'city': 'San Francisco', 'state': 'CA', 'address': '1 Main St',
+            'phone': '123-123-1234', 'genres': 'Jazz', 'facebook_link': '', 'seeking_flag': 'n',
+            'seeking_description': ''})
+        with app.app_context():
+            stored = [v.name for v in Venue.query.all()]
+        return response.status_code == 200 and stored == ['Primary Hall'] and \
+            writer.get_cookie(STICKY_COOKIE) is not None
+
+    def expire():
+        writer.set_cookie(STICKY_COOKIE, '0')
+        return venue_names(writer) == ['Replica Hall']
+
+    # With the page cache on: the reader refills the invalidated listing from
+    # the replica before the writer reads it again.
+    checks += [
+        ('writes go to the primary and set the sticky cookie', write),
+        ('other clients keep reading the replica', lambda: venue_names(reader) == ['Replica Hall']),
+        ('the writer then reads the primary', lambda: venue_names(writer) == ['Primary Hall']),
+        ('the writer returns to the replica once the window ends', expire),
+    ]
+
+    def pools():
+        text = writer.get('/metrics').get_data(as_text=True)
+        return all('fyyur_db_pool_checked_out{pool="%s"}' % label in text
+                   for label in ('primary', 'replica_1'))
+
+    checks.append(('/metrics reports the primary and replica pools', pools))
+    failed = 0
+    for label, check in checks:
+        ok = check()
+        failed += not ok
+        print('%-4s %s' % ('ok' if ok else 'FAIL', label))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check read-replica routing on two SQLite files.')
+    parser.add_argument('--dir', default=None, help='Where to create the databases (default: a temporary directory).')
+    args = parser.parse_args()
+    setup(args.dir or tempfile.mkdtemp(prefix='fyyur-replicas-'))
+    sys.exit(main())
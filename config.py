@@ -1,4 +1,16 @@
 import os
+
+
+def env(name, default, cast=str):
+    # Setting from the environment when present, e.g. FYYUR_DB_POOL_SIZE=20.
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    if cast is bool:
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return cast(value)
+
+
 SECRET_KEY = os.urandom(32)
 # Grabs the folder where the script runs.
 basedir = os.path.abspath(os.path.dirname(__file__))
@@ -7,8 +19,119 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 DEBUG = True
 
 # Connect to the database
+SQLALCHEMY_TRACK_MODIFICATIONS = False
+SQLALCHEMY_DATABASE_URI = env('DATABASE_URL', 'postgresql://Lorenzo:b@localhost:5432/fyyur')
 
+# Connection pool. Checkout wait, in-use and overflow counts are exported on
+# /metrics. Statement timeout is in milliseconds, 0 disables it.
+DB_POOL_SIZE = env('FYYUR_DB_POOL_SIZE', 5, int)
+DB_MAX_OVERFLOW = env('FYYUR_DB_MAX_OVERFLOW', 10, int)
+DB_POOL_TIMEOUT = env('FYYUR_DB_POOL_TIMEOUT', 30, float)
+DB_POOL_RECYCLE = env('FYYUR_DB_POOL_RECYCLE', 1800, int)
+DB_POOL_PRE_PING = env('FYYUR_DB_POOL_PRE_PING', True, bool)
+DB_STATEMENT_TIMEOUT = env('FYYUR_DB_STATEMENT_TIMEOUT', 30000, int)
+# Behind PgBouncer in transaction mode: no server-side prepared statements and
+# no startup parameters, so set the statement timeout in PgBouncer instead.
+DB_PGBOUNCER = env('FYYUR_DB_PGBOUNCER', False, bool)
 
-# TODO IMPLEMENT DATABASE URL
-SQLALCHEMY_TRACK_MODIFICATIONS = False
-SQLALCHEMY_DATABASE_URI = 'postgresql://Lorenzo:b@localhost:5432/fyyur'
+
+def engine_options(uri):
+    # In-memory SQLite uses a single shared connection, not a queue pool.
+    if uri.startswith('sqlite') and (':memory:' in uri or uri.rstrip('/') == 'sqlite:'):
+        return {}
+    options = {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+    }
+    connect_args = {}
+    if uri.startswith('postgresql'):
+        if DB_PGBOUNCER:
+            if uri.startswith('postgresql+psycopg:'):
+                connect_args['prepare_threshold'] = None
+            elif uri.startswith('postgresql+asyncpg:'):
+                connect_args['statement_cache_size'] = 0
+                connect_args['prepared_statement_cache_size'] = 0
+        elif DB_STATEMENT_TIMEOUT and uri.startswith('postgresql+asyncpg:'):
+            connect_args['server_settings'] = {'statement_timeout': str(DB_STATEMENT_TIMEOUT)}
+        elif DB_STATEMENT_TIMEOUT:
+            connect_args['options'] = '-c statement_timeout=%d' % DB_STATEMENT_TIMEOUT
+    if connect_args:
+        options['connect_args'] = connect_args
+    return options
+
+
+SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+
+# Read replicas for the views marked @replicas.reads (listings, detail pages,
+# searches), e.g. FYYUR_REPLICA_URLS="postgresql://...@replica1/fyyur
+# postgresql://...@replica2/fyyur"; empty sends everything to the primary.
+# A client that wrote reads from the primary for REPLICA_STICKY_SECONDS.
+# Other clients may see a page up to the replication lag plus PAGE_CACHE_TTL
+# old.
+SQLALCHEMY_REPLICA_URIS = env('FYYUR_REPLICA_URLS', [], str.split)
+REPLICA_STICKY_SECONDS = env('FYYUR_REPLICA_STICKY_SECONDS', 10, int)
+
+# Database URL for the read routes served by asgi.py, e.g.
+# postgresql+asyncpg://...; derived from the first replica, or else from
+# SQLALCHEMY_DATABASE_URI, when unset.
+ASYNC_DATABASE_URI = env('FYYUR_ASYNC_DATABASE_URL', None)
+
+# Maximum number of past and of upcoming shows rendered on a venue or artist
+# page; the section counts are always exact. None renders every show.
+DETAIL_SHOWS_LIMIT = 100
+
+# Maximum number of ranked results returned by the venue and artist search.
+SEARCH_RESULTS_LIMIT = 50
+
+# Rows per page on the keyset-paginated listings (/venues, /artists, /shows);
+# ?per_page= may ask for more, up to MAX_PAGE_SIZE.
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Rendered-page cache. The backend is a class or dotted path, e.g.
+# 'cache.RedisBackend' with PAGE_CACHE_OPTIONS = {'url': 'redis://...'} to
+# share the cache between workers.
+PAGE_CACHE_ENABLED = env('FYYUR_PAGE_CACHE', True, bool)
+PAGE_CACHE_TTL = 60
+PAGE_CACHE_BACKEND = 'cache.MemoryBackend'
+PAGE_CACHE_OPTIONS = {'maxsize': 1024}
+
+# Cache warming (warmup.py): the listings and the detail pages of the
+# WARM_CACHE_TOP venues and artists with the most shows are rendered by
+# `flask warm-cache`, and by each server process at startup when
+# WARM_CACHE_ON_START is set.
+WARM_CACHE_ON_START = env('FYYUR_WARM_CACHE_ON_START', False, bool)
+WARM_CACHE_TOP = env('FYYUR_WARM_CACHE_TOP', 20, int)
+
+# Directory for compiled Jinja templates, shared by all processes and kept
+# across restarts; templates are compiled in every process when unset.
+JINJA_BYTECODE_CACHE_DIR = env('FYYUR_JINJA_CACHE_DIR', None)
+
+# ?all=1 on /venues, /artists and /shows streams the whole listing, reading
+# rows through a server-side cursor STREAM_BATCH_SIZE at a time.
+STREAM_LISTINGS = True
+STREAM_BATCH_SIZE = 1000
+
+# Shows deleted per transaction when a venue or artist is deleted
+# (deletion.py), bounding lock time and WAL per transaction.
+DELETE_BATCH_SIZE = env('FYYUR_DELETE_BATCH_SIZE', 1000, int)
+
+# Date partitions of Show on PostgreSQL (partitions.py): `flask
+# show-partitions ensure` keeps SHOW_PARTITIONS_AHEAD months of partitions
+# ready, `archive` takes out those older than SHOW_ARCHIVE_AFTER_MONTHS.
+SHOW_PARTITIONS_AHEAD = env('FYYUR_SHOW_PARTITIONS_AHEAD', 3, int)
+SHOW_ARCHIVE_AFTER_MONTHS = env('FYYUR_SHOW_ARCHIVE_AFTER_MONTHS', 24, int)
+
+# Query budgets declared on the views with @budget.declare: 'warn' logs views
+# that exceed them or repeat a statement more than QUERY_BUDGET_MAX_REPEATS
+# times (N+1), 'raise' fails the request (tests), None turns the check off.
+QUERY_BUDGET_MODE = 'warn' if DEBUG else None
+QUERY_BUDGET_MAX_REPEATS = 3
+
+# Append every request (method, path, form, status, timing) to this JSONL
+# file for replay with benchmarks/replay.py; off when unset.
+REQUEST_LOG_PATH = env('FYYUR_REQUEST_LOG', None)
+REQUEST_LOG_SKIP = ('/static/', '/metrics')
@@ -0,0 +1,145 @@
+#----------------------------------------------------------------------------#
+# Deleting venues and artists.
+#
+# A venue or artist can have tens of thousands of shows, so its shows are
+# deleted in transactions of DELETE_BATCH_SIZE rows rather than in one: each
+# batch locks only the rows it removes (plus the owner row, which keeps new
+# shows from being added to it meanwhile), writes a bounded amount of WAL,
+# and adjusts the show counters of the artists (or venues) on the other side
+# of the deleted shows. The transaction that finds the last batch also
+# removes the genre links and the row itself. An interrupted delete leaves a
+# consistent, smaller owner behind and can simply be run again.
+#
+#   flask delete venue 12 [--batch-size 1000]
+#----------------------------------------------------------------------------#
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func, select
+
+import show_counts
+
+# owner table -> (Show column referencing it, genre link table)
+OWNERS = {
+    'Venue': ('venue_id', 'venue_genres'),
+    'Artist': ('artist_id', 'artist_genres'),
+}
+
+
+def counterpart(owner):
+    # The Show column pointing at the other side, e.g. artist_id for a venue.
+    return [fk for name, (fk, links) in OWNERS.items() if name != owner][0]
+
+
+def delete_batch(conn, metadata, owner, owner_id, batch_size):
+    """Delete up to `batch_size` shows of one venue or artist; returns them.
+
+    The rows are (id, venue_id, artist_id, date). The counters of both
+    sides are adjusted in the same transaction.
+    """
+    show = metadata.tables['Show']
+    fk, links = OWNERS[owner]
+    rows = conn.execute(
+        select(show.c.id, show.c.venue_id, show.c.artist_id, show.c.date)
+        .where(show.c[fk] == owner_id).order_by(show.c.date, show.c.id).limit(batch_size)
+        .with_for_update()).all()
+    if not rows:
+        return rows
+    # The date range lets a partitioned Show skip the other partitions.
+    conn.execute(show.delete().where(show.c.id.in_([row.id for row in rows]),
+                                     show.c.date.between(rows[0].date, rows[-1].date)))
+    rolled_at = show_counts.watermark(conn, metadata, lock='share')
+    deltas = {}
+    show_counts.show_deltas([(row.venue_id, row.artist_id, row.date) for row in rows], rolled_at, -1, deltas)
+    show_counts.apply_deltas(conn, metadata, deltas)
+    return rows
+
+
+def delete_owner(engine, metadata, owner, owner_id, batch_size=1000, progress=None):
+    """Delete a venue or artist with its shows and genre links.
+
+    Shows go in transactions of `batch_size`; `progress(deleted, total)` is
+    called after each. Returns (shows deleted, ids on the other side of the
+    deleted shows), or None when there is no such row.
+    """
+    table = metadata.tables[owner]
+    show = metadata.tables['Show']
+    fk, links = OWNERS[owner]
+    other = counterpart(owner)
+    with engine.connect() as conn:
+        if conn.execute(select(table.c.id).where(table.c.id == owner_id)).first() is None:
+            return None
+        total = conn.execute(select(func.count()).select_from(show).where(show.c[fk] == owner_id)).scalar()
+    deleted, touched = 0, set()
+    while True:
+        with engine.begin() as conn:
+            locked = conn.execute(
+                select(table.c.id).where(table.c.id == owner_id).with_for_update()).first()
+            if locked is None:
+                break
+            rows = delete_batch(conn, metadata, owner, owner_id, batch_size)
+            last = len(rows) < batch_size
+            if last:
+                conn.execute(metadata.tables[links].delete().where(metadata.tables[links].c[fk] == owner_id))
+                conn.execute(table.delete().where(table.c.id == owner_id))
+        deleted += len(rows)
+        touched.update(row._mapping[other] for row in rows)
+        if progress is not None:
+            progress(deleted, max(total, deleted))
+        if last:
+            break
+    return deleted, touched
+
+
+def log_progress(kind, owner_id, every=10):
+    # progress() for delete() in a request: logs every `every` batches.
+    calls = [0]
+
+    def progress(deleted, total):
+        calls[0] += 1
+        if calls[0] % every == 0:
+            current_app.logger.info('Deleting %s %d: %d/%d shows', kind, owner_id, deleted, total)
+    return progress
+
+
+def invalidate(owner, owner_id, touched):
+    page_cache = current_app.extensions.get('page_cache')
+    if page_cache is None:
+        return
+    other = counterpart(owner)[:-len('_id')]
+    page_cache.invalidate('venues', 'artists', 'shows', '%s:%s' % (owner.lower(), owner_id),
+                          *['%s:%s' % (other, id) for id in sorted(touched)])
+
+
+def delete(owner, owner_id, progress=None, batch_size=None):
+    """delete_owner() on the app's database, then invalidate the cached pages."""
+    from models import db
+
+    batch_size = batch_size or current_app.config.get('DELETE_BATCH_SIZE', 1000)
+    result = delete_owner(db.engine, db.metadata, owner, owner_id, batch_size, progress)
+    if result is not None:
+        invalidate(owner, owner_id, result[1])
+        # The batches commit outside the session, so replicas.py doesn't see
+        # the write; keep the client on the primary all the same.
+        replicas = current_app.extensions.get('replicas')
+        if replicas is not None:
+            replicas.wrote()
+    return result
+
+
+@click.command('delete')
+@click.argument('kind', type=click.Choice(['venue', 'artist']))
+@click.argument('owner_id', type=int)
+@click.option('--batch-size', type=int, default=None, help='Shows per transaction (default DELETE_BATCH_SIZE).')
+@with_appcontext
+def delete_command(kind, owner_id, batch_size):
+    """Delete a venue or artist with all of its shows."""
+
+    def progress(deleted, total):
+        click.echo('\r%d/%d shows deleted' % (deleted, total), nl=False)
+
+    result = delete(kind.title(), owner_id, progress, batch_size)
+    if result is None:
+        raise click.ClickException('No %s with id %d' % (kind, owner_id))
+    click.echo('\nDeleted %s %d and %d shows' % (kind, owner_id, result[0]))
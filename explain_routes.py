@@ -0,0 +1,104 @@
+#----------------------------------------------------------------------------#
+# Checks that the hot routes in app.py are served by the indexes declared on
+# the models. Every statement a route issues is captured and EXPLAINed; the
+# route passes when all of its expected indexes appear in the plans.
+#
+#   python explain_routes.py
+#----------------------------------------------------------------------------#
+
+import sys
+from sqlalchemy import event
+from app import app
+from models import db, Venue, Artist
+
+# (method, path, form, expected indexes). Indexes listed in
+# DIALECT_INDEXES are only checked on that backend.
+HOT_ROUTES = [
+    ('GET', '/venues', None, ['ix_venue_area_name']),
+    ('GET', '/artists', None, ['ix_artist_name_id']),
+    ('GET', '/shows', None, ['ix_show_date']),
+    ('GET', '/venues/{venue_id}', None, ['ix_show_venue_id_date']),
+    ('GET', '/artists/{artist_id}', None, ['ix_show_artist_id_date']),
+    ('POST', '/venues/search', {'search_term': 'the'},
+     ['ix_venue_search', 'ix_venue_name_trgm', 'venue_fts']),
+    ('POST', '/artists/search', {'search_term': 'the'},
+     ['ix_artist_search', 'ix_artist_name_trgm', 'artist_fts']),
+]
+DIALECT_INDEXES = {
+    'ix_venue_search': 'postgresql',
+    'ix_artist_search': 'postgresql',
+    'ix_venue_name_trgm': 'postgresql',
+    'ix_artist_name_trgm': 'postgresql',
+    'venue_fts': 'sqlite',
+    'artist_fts': 'sqlite',
+}
+
+
+def capture_statements(client, method, path, form):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.open(path, method=method, data=form)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return response, statements
+
+
+def explain(statements):
+    dialect = db.engine.dialect.name
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN '
+    lines = []
+    with db.engine.connect() as conn:
+        if dialect == 'postgresql':
+            # Tiny tables are cheaper to scan; make the planner show whether
+            # an index is usable at all rather than whether it is worth it.
+            conn.exec_driver_sql('SET enable_seqscan = off')
+        for statement, parameters in statements:
+            for row in conn.exec_driver_sql(prefix + statement, parameters):
+                lines.append(str(row[-1]))
+        plan = '\n'.join(lines)
+        if dialect == 'postgresql':
+            # Scans of a partitioned table (Show) name the partitions' own
+            # indexes; count them as the index declared on the table.
+            for child, parent in conn.exec_driver_sql('''
+                    SELECT c.relname, p.relname FROM pg_inherits i
+                    JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent
+                    WHERE p.relkind = 'I' '''):
+                plan = plan.replace('"%s"' % child, parent)
+    return plan
+
+
+def main():
+    ids = {
+        'venue_id': db.session.query(Venue.id).order_by(Venue.id).limit(1).scalar(),
+        'artist_id': db.session.query(Artist.id).order_by(Artist.id).limit(1).scalar(),
+    }
+    if None in ids.values():
+        print('Load some venues and artists first.')
+        return 1
+
+    client = app.test_client()
+    dialect = db.engine.dialect.name
+    failed = 0
+    for method, path, form, expected in HOT_ROUTES:
+        path = path.format(**ids)
+        expected = [i for i in expected if DIALECT_INDEXES.get(i, dialect) == dialect]
+        response, statements = capture_statements(client, method, path, form)
+        plan = explain(statements)
+        missing = [i for i in expected if i not in plan]
+        status = 'ok' if response.status_code < 400 and not missing else 'FAIL'
+        failed += status == 'FAIL'
+        print('%-4s %-6s %-22s %d statements, uses %s%s' % (
+            status, method, path, len(statements), ', '.join(expected) or '-',
+            ' (missing %s)' % ', '.join(missing) if missing else ''))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    with app.app_context():
+        sys.exit(main())
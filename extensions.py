@@ -0,0 +1,32 @@
+#----------------------------------------------------------------------------#
+# Extension instances, bound to an app by app.create_app.
+#
+# Views decorate with page_cache, budget and replicas at import time, so these exist
+# before any app does.
+#----------------------------------------------------------------------------#
+
+from flask_moment import Moment
+
+from cache import PageCache
+from metrics import Metrics, RequestMetrics, pool_collector, page_cache_collector
+from models import db
+from querybudget import QueryBudget
+from replicas import Replicas
+from request_log import RequestLog
+
+moment = Moment()
+page_cache = PageCache()
+metrics = Metrics()
+request_metrics = RequestMetrics(metrics)
+budget = QueryBudget()
+replicas = Replicas()
+request_log = RequestLog()
+
+def pooled_engines():
+    # The primary and each read replica, labelled for the pool metrics.
+    return [('primary', db.engine)] + [
+        ('replica_%d' % i, engine) for i, engine in enumerate(replicas.engines, 1)]
+
+
+metrics.register(pool_collector(pooled_engines))
+metrics.register(page_cache_collector(page_cache))
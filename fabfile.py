@@ -44,12 +44,20 @@ def heroku_test():
     )
 
 
+def warm():
+    # Render the hottest pages through the web dynos (see warmup.py).
+    local(
+        "heroku run flask warm-cache --url $(heroku info -s | grep '^web_url=' | cut -d= -f2)"
+    )
+
+
 def deploy():
     pull()
     test()
     commit()
     heroku()
     heroku_test()
+    warm()
 
 # rollback
 
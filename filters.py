@@ -0,0 +1,43 @@
+#----------------------------------------------------------------------------#
+# Template filters.
+#
+# babel and dateutil are imported on first use rather than at start-up.
+#----------------------------------------------------------------------------#
+
+import functools
+from datetime import timezone
+
+DATETIME_FORMATS = {
+  'full': "EEEE MMMM, d, y 'at' h:mma",
+  'medium': "EE MM, dd, y h:mma",
+}
+
+@functools.lru_cache(maxsize=64)
+def datetime_pattern(format, locale):
+  # Compiled babel pattern and parsed locale, built once per (format, locale).
+  # Babel's named formats ('short', 'long', ...) are resolved to the locale's
+  # date and time patterns joined by its datetime pattern.
+  import babel
+  import babel.dates
+  locale = babel.Locale.parse(locale or babel.dates.LC_TIME)
+  if format in DATETIME_FORMATS:
+    pattern = DATETIME_FORMATS[format]
+  elif format in ('full', 'long', 'medium', 'short'):
+    pattern = babel.dates.get_datetime_format(format, locale) \
+      .replace('{0}', babel.dates.get_time_format(format, locale).pattern) \
+      .replace('{1}', babel.dates.get_date_format(format, locale).pattern)
+  else:
+    pattern = format
+  return babel.dates.parse_pattern(pattern), locale
+
+def format_datetime(value, format='medium', locale=None):
+  # Dates from the database arrive as datetimes; strings (form input, old
+  # callers) still go through dateutil. Naive datetimes are taken as UTC, as
+  # babel.dates.format_datetime does.
+  if isinstance(value, str):
+    import dateutil.parser
+    value = dateutil.parser.parse(value)
+  if value.tzinfo is None:
+    value = value.replace(tzinfo=timezone.utc)
+  pattern, locale = datetime_pattern(format, locale)
+  return pattern.apply(value, locale)
@@ -0,0 +1,8 @@
+# gunicorn reads this file from the working directory: `gunicorn app:app`.
+
+
+def post_worker_init(worker):
+    # Render the hottest pages before the worker takes requests, when
+    # WARM_CACHE_ON_START is set (see warmup.py).
+    from warmup import warm_on_start
+    warm_on_start(worker.wsgi)
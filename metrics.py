@@ -0,0 +1,228 @@
+#----------------------------------------------------------------------------#
+# Application metrics in the Prometheus text format, served on /metrics.
+#
+# Collectors are callables returning (name, type, help, samples) tuples where
+# samples is a list of (suffix, labels dict, value), the suffix being '' or
+# e.g. '_sum' / '_bucket'; they are read at scrape time.
+#----------------------------------------------------------------------------#
+
+import bisect
+import threading
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection."""
+
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self._stats_lock = threading.Lock()
+        self.wait_seconds = 0.0
+        self.wait_count = 0
+        self.timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._stats_lock:
+                self.wait_seconds += elapsed
+                self.wait_count += 1
+
+
+def instrument_pool(options):
+    """Use InstrumentedQueuePool for engines configured with a queue pool."""
+    if 'pool_size' in options:
+        options.setdefault('poolclass', InstrumentedQueuePool)
+    return options
+
+
+def pool_collector(get_engines):
+    """Collect the connection pool gauges of the (label, engine) pairs from
+    `get_engines`, one series per engine labelled pool=<label>."""
+    def collect():
+        families = {}
+        for label, engine in get_engines():
+            for name, kind, help, samples in pool_metrics(engine.pool):
+                family = families.setdefault(name, (name, kind, help, []))
+                family[3].extend((suffix, dict(labels, pool=label), value)
+                                 for suffix, labels, value in samples)
+        return list(families.values())
+    return collect
+
+
+def pool_metrics(pool):
+    if not isinstance(pool, QueuePool):
+        return []
+    metrics = [
+        ('fyyur_db_pool_size', 'gauge', 'Configured pool size.', pool.size()),
+        ('fyyur_db_pool_checked_out', 'gauge', 'Connections in use.', pool.checkedout()),
+        ('fyyur_db_pool_checked_in', 'gauge', 'Idle connections in the pool.', pool.checkedin()),
+        ('fyyur_db_pool_overflow', 'gauge', 'Connections open beyond pool_size.', max(pool.overflow(), 0)),
+    ]
+    if isinstance(pool, InstrumentedQueuePool):
+        metrics.append(('fyyur_db_pool_checkout_timeouts_total', 'counter',
+                        'Checkouts that timed out waiting for a connection.', pool.timeouts))
+    metrics = [(name, kind, help, [('', {}, value)]) for name, kind, help, value in metrics]
+    if isinstance(pool, InstrumentedQueuePool):
+        metrics.append(('fyyur_db_pool_checkout_wait_seconds', 'summary',
+                        'Time spent waiting for a pooled connection.',
+                        [('_sum', {}, pool.wait_seconds), ('_count', {}, pool.wait_count)]))
+    return metrics
+
+
+def page_cache_collector(page_cache):
+    def collect():
+        return [
+            ('fyyur_page_cache_%s_total' % key, 'counter', 'Page cache %s.' % key, [('', {}, value)])
+            for key, value in sorted(page_cache.stats.items())
+        ]
+    return collect
+
+
+class Histogram(object):
+    """Fixed-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name, help, label_names, buckets):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def collect(self):
+        samples = []
+        with self._lock:
+            series = sorted((k, [list(v[0]), v[1], v[2]]) for k, v in self._series.items())
+        for label_values, (counts, total, count) in series:
+            labels = dict(zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                samples.append(('_bucket', dict(labels, le=le), cumulative))
+            samples.append(('_sum', labels, total))
+            samples.append(('_count', labels, count))
+        return [(self.name, 'histogram', self.help, samples)]
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault('fyyur_query_start', []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('fyyur_query_start')
+    if starts and has_request_context():
+        elapsed = time.perf_counter() - starts.pop()
+        g.sql_statements = g.get('sql_statements', 0) + 1
+        g.sql_seconds = g.get('sql_seconds', 0.0) + elapsed
+
+
+def handle_error(context):
+    # A failed statement never reaches after_cursor_execute.
+    starts = context.connection.info.get('fyyur_query_start') if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+class RequestMetrics(object):
+    """Per-endpoint latency, SQL statement count and SQL time histograms."""
+
+    def __init__(self, metrics, app=None):
+        self.latency = Histogram(
+            'fyyur_request_duration_seconds', 'Request latency by endpoint.',
+            ('endpoint', 'method'), LATENCY_BUCKETS)
+        self.statements = Histogram(
+            'fyyur_request_sql_statements', 'SQL statements executed per request.',
+            ('endpoint', 'method'), STATEMENT_BUCKETS)
+        self.sql_time = Histogram(
+            'fyyur_request_sql_seconds', 'Time spent in SQL per request.',
+            ('endpoint', 'method'), LATENCY_BUCKETS)
+        for histogram in (self.latency, self.statements, self.sql_time):
+            metrics.register(histogram.collect)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not event.contains(Engine, 'before_cursor_execute', before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', after_cursor_execute)
+            event.listen(Engine, 'handle_error', handle_error)
+        app.before_request(self.start)
+        app.teardown_request(self.finish)
+
+    def start(self):
+        g.request_started = time.perf_counter()
+        g.sql_statements = 0
+        g.sql_seconds = 0.0
+
+    def finish(self, error=None):
+        started = g.pop('request_started', None)
+        if started is None:
+            return
+        labels = (request.endpoint or 'unknown', request.method)
+        self.latency.observe(labels, time.perf_counter() - started)
+        self.statements.observe(labels, g.get('sql_statements', 0))
+        self.sql_time.observe(labels, g.get('sql_seconds', 0.0))
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{%s}' % ','.join(
+        '%s="%s"' % (k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in sorted(labels.items()))
+
+
+class Metrics(object):
+
+    def __init__(self, app=None):
+        self.collectors = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.add_url_rule('/metrics', 'metrics', self.view)
+        app.extensions['metrics'] = self
+
+    def register(self, collector):
+        self.collectors.append(collector)
+        return collector
+
+    def render(self):
+        lines = []
+        for collector in self.collectors:
+            for name, kind, help, samples in collector():
+                lines.append('# HELP %s %s' % (name, help))
+                lines.append('# TYPE %s %s' % (name, kind))
+                for suffix, labels, value in samples:
+                    lines.append('%s%s%s %s' % (name, suffix, format_labels(labels), repr(float(value))))
+        return '\n'.join(lines) + '\n'
+
+    def view(self):
+        from flask import current_app
+        return current_app.response_class(self.render(), mimetype='text/plain; version=0.0.4')
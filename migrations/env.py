@@ -1,6 +1,7 @@
 from __future__ import with_statement
 
 import logging
+import re
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
@@ -26,6 +27,34 @@ config.set_main_option('sqlalchemy.url',
                        current_app.config.get('SQLALCHEMY_DATABASE_URI'))
 target_metadata = current_app.extensions['migrate'].db.metadata
 
+# The SQLite full-text tables of search.py (and FTS5's shadow tables) come
+# from migrations and create_all events, not from the models; keep
+# autogenerate from dropping them.
+FTS_TABLES = re.compile(r'(venue|artist)_fts(_(data|idx|content|docsize|config))?$')
+# Likewise the date partitions of Show on PostgreSQL, managed by
+# partitions.py, and the partitions it archived.
+SHOW_PARTITIONS = re.compile(r'Show_(before|after|\d{4}(_\d{2})?)$')
+ARCHIVE_SCHEMA = 'archive'
+# The trigram and full-text GIN indexes of the models exist on PostgreSQL
+# only (ddl_if); on other dialects the migrations drop or never create them.
+POSTGRESQL_INDEXES = re.compile(r'ix_(venue|artist)_(name_trgm|search)$')
+
+
+def include_name(name, type_, parent_names):
+    if type_ == 'schema':
+        return name != ARCHIVE_SCHEMA
+    if type_ == 'table':
+        return not FTS_TABLES.match(name) and not SHOW_PARTITIONS.match(name) \
+            and parent_names.get('schema_name') != ARCHIVE_SCHEMA
+    return True
+
+
+def include_object(object_, name, type_, reflected, compare_to):
+    if type_ == 'index' and not reflected and POSTGRESQL_INDEXES.match(name):
+        return context.get_context().dialect.name == 'postgresql'
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -46,7 +75,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=target_metadata, literal_binds=True
+        url=url, target_metadata=target_metadata, literal_binds=True,
+        include_name=include_name, include_object=include_object
     )
 
     with context.begin_transaction():
@@ -82,6 +112,8 @@ def run_migrations_online():
             connection=connection,
             target_metadata=target_metadata,
             process_revision_directives=process_revision_directives,
+            include_name=include_name,
+            include_object=include_object,
             **current_app.extensions['migrate'].configure_args
         )
 
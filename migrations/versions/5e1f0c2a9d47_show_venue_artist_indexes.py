@@ -0,0 +1,41 @@
+"""Indexes for the Show, Venue and Artist access paths.
+
+Revision ID: 5e1f0c2a9d47
+Revises: b3b293f7848c
+Create Date: 2026-10-18 09:12:31.402118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e1f0c2a9d47'
+down_revision = 'b3b293f7848c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_show_venue_id_date', 'Show', ['venue_id', 'date'], unique=False)
+    op.create_index('ix_show_artist_id_date', 'Show', ['artist_id', 'date'], unique=False)
+    op.create_index('ix_show_date', 'Show', ['date'], unique=False)
+    op.create_index('ix_venue_city_state', 'Venue', ['city', 'state'], unique=False)
+
+    # Trigram indexes serve the name ilike '%term%' searches; they need the
+    # pg_trgm extension and degrade to plain btree indexes elsewhere.
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_venue_name_trgm', 'Venue', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_artist_name_trgm', 'Artist', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_artist_name_trgm', table_name='Artist')
+    op.drop_index('ix_venue_name_trgm', table_name='Venue')
+    op.drop_index('ix_venue_city_state', table_name='Venue')
+    op.drop_index('ix_show_date', table_name='Show')
+    op.drop_index('ix_show_artist_id_date', table_name='Show')
+    op.drop_index('ix_show_venue_id_date', table_name='Show')
@@ -0,0 +1,52 @@
+"""Full-text search indexes on Venue and Artist.
+
+Revision ID: 8b4d6e13f2a0
+Revises: 5e1f0c2a9d47
+Create Date: 2026-10-18 11:40:05.118263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4d6e13f2a0'
+down_revision = '5e1f0c2a9d47'
+branch_labels = None
+depends_on = None
+
+TABLES = ('Venue', 'Artist')
+DOCUMENT = ("to_tsvector('simple'::regconfig, coalesce(name, '') || ' ' || "
+            "coalesce(city, '') || ' ' || coalesce(genres, ''))")
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for table in TABLES:
+        fts = table.lower() + '_fts'
+        if dialect == 'postgresql':
+            op.execute('CREATE INDEX ix_{0}_search ON "{1}" USING gin ({2})'.format(
+                table.lower(), table, DOCUMENT))
+        elif dialect == 'sqlite':
+            op.execute("CREATE VIRTUAL TABLE {0} USING fts5(name, city, genres, "
+                       "content='{1}', content_rowid='id')".format(fts, table))
+            insert = ("INSERT INTO {0}(rowid, name, city, genres) "
+                      "VALUES (new.id, new.name, new.city, new.genres);").format(fts)
+            delete = ("INSERT INTO {0}({0}, rowid, name, city, genres) "
+                      "VALUES ('delete', old.id, old.name, old.city, old.genres);").format(fts)
+            op.execute('CREATE TRIGGER {0}_ai AFTER INSERT ON "{1}" BEGIN {2} END'.format(fts, table, insert))
+            op.execute('CREATE TRIGGER {0}_ad AFTER DELETE ON "{1}" BEGIN {2} END'.format(fts, table, delete))
+            op.execute('CREATE TRIGGER {0}_au AFTER UPDATE ON "{1}" BEGIN {2} {3} END'.format(fts, table, delete, insert))
+            op.execute("INSERT INTO {0}({0}) VALUES ('rebuild')".format(fts))
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for table in TABLES:
+        if dialect == 'postgresql':
+            op.drop_index('ix_{0}_search'.format(table.lower()), table_name=table)
+        elif dialect == 'sqlite':
+            fts = table.lower() + '_fts'
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute('DROP TRIGGER IF EXISTS {0}_{1}'.format(fts, suffix))
+            op.execute('DROP TABLE IF EXISTS {0}'.format(fts))
@@ -0,0 +1,48 @@
+"""Maintained past/upcoming show counters on Venue and Artist.
+
+Revision ID: a1b7d3e9c5f2
+Revises: f4a6c8d2b391
+Create Date: 2026-10-18 17:05:31.618204
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1b7d3e9c5f2'
+down_revision = 'f4a6c8d2b391'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('Venue', 'Artist'):
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(), server_default='0', nullable=False))
+    state = op.create_table('show_counts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('rolled_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # Count every show at one watermark; `flask show-counts roll` moves it on.
+    now = datetime.now()
+    op.bulk_insert(state, [{'id': 1, 'rolled_at': now}])
+    show = sa.table('Show', sa.column('venue_id'), sa.column('artist_id'), sa.column('date'))
+    for table, fk in (('Venue', 'venue_id'), ('Artist', 'artist_id')):
+        owner = sa.table(table, sa.column('id'), sa.column('upcoming_shows_count'), sa.column('past_shows_count'))
+        counts = {}
+        for name, condition in (('upcoming_shows_count', show.c.date > now),
+                                ('past_shows_count', show.c.date <= now)):
+            counts[name] = sa.select(sa.func.count()) \
+                .where(show.c[fk] == owner.c.id, condition).scalar_subquery()
+        op.execute(owner.update().values(**counts))
+
+
+def downgrade():
+    op.drop_table('show_counts')
+    for table in ('Artist', 'Venue'):
+        op.drop_column(table, 'past_shows_count')
+        op.drop_column(table, 'upcoming_shows_count')
@@ -0,0 +1,35 @@
+"""Order the venue and artist listings by NULL-safe keys.
+
+Revision ID: b5f0e2c7a913
+Revises: d7e3f1a95b62
+Create Date: 2026-10-18 23:02:41.118356
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5f0e2c7a913'
+down_revision = 'd7e3f1a95b62'
+branch_labels = None
+depends_on = None
+
+
+def key(column):
+    return sa.text("coalesce(%s, '')" % column)
+
+
+def upgrade():
+    op.drop_index('ix_venue_area_name', table_name='Venue')
+    op.create_index('ix_venue_area_name', 'Venue',
+                    [key('city'), key('state'), key('name'), 'id'], unique=False)
+    op.drop_index('ix_artist_name_id', table_name='Artist')
+    op.create_index('ix_artist_name_id', 'Artist', [key('name'), 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_artist_name_id', table_name='Artist')
+    op.create_index('ix_artist_name_id', 'Artist', ['name', 'id'], unique=False)
+    op.drop_index('ix_venue_area_name', table_name='Venue')
+    op.create_index('ix_venue_area_name', 'Venue', ['city', 'state', 'name', 'id'], unique=False)
@@ -0,0 +1,36 @@
+"""Indexes backing keyset pagination of the listings.
+
+Revision ID: c9a27f4e81d3
+Revises: 8b4d6e13f2a0
+Create Date: 2026-10-18 13:05:52.630417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9a27f4e81d3'
+down_revision = '8b4d6e13f2a0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_venue_area_name', 'Venue', ['city', 'state', 'name', 'id'], unique=False)
+    op.drop_index('ix_venue_city_state', table_name='Venue')
+    op.create_index('ix_artist_name_id', 'Artist', ['name', 'id'], unique=False)
+    if op.get_bind().dialect.name != 'postgresql':
+        # Without pg_trgm these were plain name indexes, now covered by the
+        # (name, id) ones above.
+        op.drop_index('ix_venue_name_trgm', table_name='Venue')
+        op.drop_index('ix_artist_name_trgm', table_name='Artist')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        op.create_index('ix_artist_name_trgm', 'Artist', ['name'], unique=False)
+        op.create_index('ix_venue_name_trgm', 'Venue', ['name'], unique=False)
+    op.drop_index('ix_artist_name_id', table_name='Artist')
+    op.create_index('ix_venue_city_state', 'Venue', ['city', 'state'], unique=False)
+    op.drop_index('ix_venue_area_name', table_name='Venue')
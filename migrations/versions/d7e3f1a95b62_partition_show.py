@@ -0,0 +1,126 @@
+"""Range-partition Show by date on PostgreSQL.
+
+Revision ID: d7e3f1a95b62
+Revises: a1b7d3e9c5f2
+Create Date: 2026-10-18 21:14:06.351872
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7e3f1a95b62'
+down_revision = 'a1b7d3e9c5f2'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('ix_show_venue_id_date', ['venue_id', 'date']),
+    ('ix_show_artist_id_date', ['artist_id', 'date']),
+    ('ix_show_date', ['date']),
+)
+# Monthly partitions are created this many months past now; later ones come
+# from `flask show-partitions ensure`.
+AHEAD = 3
+
+
+def add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def literal(bound, unbounded):
+    return "'%s'" % bound.isoformat(' ') if bound is not None else unbounded
+
+
+def bounds(first, now):
+    """(name, start, end) from first's year: years before now's, then months
+    up to AHEAD past now's. Later shows, however far out, go to Show_after.
+    """
+    ranges = [('Show_%d' % year, datetime(year, 1, 1), datetime(year + 1, 1, 1))
+              for year in range(first.year, now.year)]
+    month = datetime(now.year, 1, 1)
+    end = add_months(datetime(now.year, now.month, 1), AHEAD + 1)
+    while month < end:
+        ranges.append(('Show_%d_%02d' % (month.year, month.month), month, add_months(month, 1)))
+        month = add_months(month, 1)
+    return ranges
+
+
+def upgrade():
+    conn = op.get_bind()
+    if conn.execute(sa.text('SELECT count(*) FROM "Show" WHERE date IS NULL')).scalar():
+        raise RuntimeError('Shows without a date cannot be partitioned; date them or delete them first')
+    if conn.dialect.name != 'postgresql':
+        with op.batch_alter_table('Show') as batch_op:
+            batch_op.alter_column('date', existing_type=sa.DateTime(), nullable=False)
+        return
+
+    # Every unique constraint on a partitioned table includes the partition
+    # key, so the primary key becomes (id, date); ids still come from the one
+    # sequence and stay unique.
+    for name, columns in INDEXES:
+        op.drop_index(name, table_name='Show')
+    op.execute('ALTER TABLE "Show" RENAME TO "Show_unpartitioned"')
+    op.execute('ALTER TABLE "Show_unpartitioned" RENAME CONSTRAINT "Show_pkey" TO "Show_unpartitioned_pkey"')
+    op.execute('''
+        CREATE TABLE "Show" (
+            id INTEGER NOT NULL DEFAULT nextval('"Show_id_seq"'::regclass),
+            date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            venue_id INTEGER NOT NULL REFERENCES "Venue" (id),
+            artist_id INTEGER NOT NULL REFERENCES "Artist" (id),
+            import_hash VARCHAR(32),
+            import_missing_since TIMESTAMP WITHOUT TIME ZONE,
+            CONSTRAINT "Show_pkey" PRIMARY KEY (id, date)
+        ) PARTITION BY RANGE (date)''')
+
+    now = datetime.now()
+    first = conn.execute(sa.text('SELECT min(date) FROM "Show_unpartitioned"')).scalar()
+    ranges = bounds(first or now, now)
+    # Open-ended partitions on both sides rather than a DEFAULT one, which
+    # would keep the planner from scanning the partitions in date order.
+    ranges = [('Show_before', None, ranges[0][1])] + ranges + [('Show_after', ranges[-1][2], None)]
+    for name, start, end in ranges:
+        op.execute('CREATE TABLE "%s" PARTITION OF "Show" FOR VALUES FROM (%s) TO (%s)' % (
+            name, literal(start, 'MINVALUE'), literal(end, 'MAXVALUE')))
+
+    op.execute('INSERT INTO "Show" SELECT id, date, venue_id, artist_id, import_hash, import_missing_since '
+               'FROM "Show_unpartitioned"')
+    for name, columns in INDEXES:
+        op.create_index(name, 'Show', columns, unique=False)
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY "Show".id')
+    op.execute('DROP TABLE "Show_unpartitioned"')
+    op.execute('ANALYZE "Show"')
+
+
+def downgrade():
+    conn = op.get_bind()
+    if conn.dialect.name != 'postgresql':
+        with op.batch_alter_table('Show') as batch_op:
+            batch_op.alter_column('date', existing_type=sa.DateTime(), nullable=True)
+        return
+
+    # Partitions archived with `flask show-partitions archive` stay in the
+    # archive schema; only the shows still in Show are copied back.
+    for name, columns in INDEXES:
+        op.drop_index(name, table_name='Show')
+    op.execute('ALTER TABLE "Show" RENAME TO "Show_partitioned"')
+    op.execute('ALTER TABLE "Show_partitioned" RENAME CONSTRAINT "Show_pkey" TO "Show_partitioned_pkey"')
+    op.execute('''
+        CREATE TABLE "Show" (
+            id INTEGER NOT NULL DEFAULT nextval('"Show_id_seq"'::regclass),
+            date TIMESTAMP WITHOUT TIME ZONE,
+            venue_id INTEGER NOT NULL REFERENCES "Venue" (id),
+            artist_id INTEGER NOT NULL REFERENCES "Artist" (id),
+            import_hash VARCHAR(32),
+            import_missing_since TIMESTAMP WITHOUT TIME ZONE,
+            CONSTRAINT "Show_pkey" PRIMARY KEY (id)
+        )''')
+    op.execute('INSERT INTO "Show" SELECT id, date, venue_id, artist_id, import_hash, import_missing_since '
+               'FROM "Show_partitioned"')
+    for name, columns in INDEXES:
+        op.create_index(name, 'Show', columns, unique=False)
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY "Show".id')
+    op.execute('DROP TABLE "Show_partitioned"')
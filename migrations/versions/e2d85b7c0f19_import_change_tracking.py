@@ -0,0 +1,28 @@
+"""Change tracking columns for incremental CSV imports.
+
+Revision ID: e2d85b7c0f19
+Revises: c9a27f4e81d3
+Create Date: 2026-10-18 14:22:47.905531
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2d85b7c0f19'
+down_revision = 'c9a27f4e81d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('Venue', 'Artist', 'Show'):
+        op.add_column(table, sa.Column('import_hash', sa.String(length=32), nullable=True))
+        op.add_column(table, sa.Column('import_missing_since', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    for table in ('Show', 'Artist', 'Venue'):
+        op.drop_column(table, 'import_missing_since')
+        op.drop_column(table, 'import_hash')
@@ -0,0 +1,61 @@
+"""Normalized genres for venues and artists.
+
+Revision ID: f4a6c8d2b391
+Revises: e2d85b7c0f19
+Create Date: 2026-10-18 15:48:10.274903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4a6c8d2b391'
+down_revision = 'e2d85b7c0f19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    genre = op.create_table('Genre',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    for owner in ('venue', 'artist'):
+        op.create_table(owner + '_genres',
+        sa.Column(owner + '_id', sa.Integer(), nullable=False),
+        sa.Column('genre_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint([owner + '_id'], [owner.capitalize() + '.id'], ),
+        sa.ForeignKeyConstraint(['genre_id'], ['Genre.id'], ),
+        sa.PrimaryKeyConstraint(owner + '_id', 'genre_id')
+        )
+        op.create_index('ix_{0}_genres_genre_id_{0}_id'.format(owner), owner + '_genres',
+                        ['genre_id', owner + '_id'], unique=False)
+
+    # Split the existing comma-joined strings into genre rows and links. The
+    # strings stay in place as the search document's genre text.
+    conn = op.get_bind()
+    owners = {}
+    for owner in ('venue', 'artist'):
+        rows = conn.execute(sa.text('SELECT id, genres FROM "%s"' % owner.capitalize())).all()
+        owners[owner] = [(id, [g.strip() for g in (genres or '').split(',') if g.strip()])
+                         for id, genres in rows]
+    names = sorted(set(g for rows in owners.values() for id, genres in rows for g in genres))
+    if names:
+        op.bulk_insert(genre, [{'name': name} for name in names])
+    ids = dict(conn.execute(sa.text('SELECT name, id FROM "Genre"')).all())
+    for owner, rows in owners.items():
+        links = sorted(set((id, ids[g]) for id, genres in rows for g in genres))
+        if links:
+            conn.execute(
+                sa.text('INSERT INTO {0}_genres ({0}_id, genre_id) VALUES (:owner_id, :genre_id)'.format(owner)),
+                [{'owner_id': id, 'genre_id': genre_id} for id, genre_id in links])
+
+
+def downgrade():
+    for owner in ('artist', 'venue'):
+        op.drop_index('ix_{0}_genres_genre_id_{0}_id'.format(owner), table_name=owner + '_genres')
+        op.drop_table(owner + '_genres')
+    op.drop_table('Genre')
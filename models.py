@@ -0,0 +1,129 @@
+#----------------------------------------------------------------------------#
+# Models.
+#
+# Shared by the web app (app.create_app), the ASGI entry point and the CLI
+# commands; `db` is bound to an app with db.init_app in the factory.
+#----------------------------------------------------------------------------#
+
+from flask_sqlalchemy import SQLAlchemy
+
+import search
+import show_counts
+from replicas import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+def sort_key(column):
+    # `column` with NULL read as '', for the keyset-paginated listings: a NULL
+    # in the cursor would make the row comparison unknown and end the listing.
+    return db.func.coalesce(column, db.literal_column("''"))
+
+
+class Genre(db.Model):
+    __tablename__ = 'Genre'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False, unique=True)
+
+# The (genre_id, owner_id) indexes serve the genre filters; the primary keys
+# serve loading the genres of one venue or artist.
+venue_genres = db.Table('venue_genres',
+    db.Column('venue_id', db.Integer, db.ForeignKey('Venue.id'), primary_key=True),
+    db.Column('genre_id', db.Integer, db.ForeignKey('Genre.id'), primary_key=True),
+    db.Index('ix_venue_genres_genre_id_venue_id', 'genre_id', 'venue_id'),
+)
+
+artist_genres = db.Table('artist_genres',
+    db.Column('artist_id', db.Integer, db.ForeignKey('Artist.id'), primary_key=True),
+    db.Column('genre_id', db.Integer, db.ForeignKey('Genre.id'), primary_key=True),
+    db.Index('ix_artist_genres_genre_id_artist_id', 'genre_id', 'artist_id'),
+)
+
+class Venue(db.Model):
+    __tablename__ = 'Venue'
+    __table_args__ = (
+        db.Index('ix_venue_name_trgm', 'name',
+                 postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String)
+    city = db.Column(db.String(120))
+    state = db.Column(db.String(120))
+    address = db.Column(db.String(120))
+    phone = db.Column(db.String(120))
+    # Comma-joined copy of `genres`, kept for the full-text search document.
+    genres_text = db.Column('genres', db.String(120))
+    image_link = db.Column(db.String(500))
+    website_link = db.Column(db.String(120))
+    facebook_link = db.Column(db.String(120))
+    seeking_flag = db.Column(db.Boolean())
+    seeking_description = db.Column(db.String(500))
+    import_hash = db.Column(db.String(32))
+    import_missing_since = db.Column(db.DateTime)
+    # Maintained by show_counts; split at its watermark, not at query time.
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    genres = db.relationship('Genre', secondary=venue_genres, lazy=True, order_by='Genre.name')
+    show = db.relationship('Show', backref=db.backref('venue', lazy=True))
+
+class Artist(db.Model):
+    __tablename__ = 'Artist'
+    __table_args__ = (
+        db.Index('ix_artist_name_trgm', 'name',
+                 postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String)
+    city = db.Column(db.String(120))
+    state = db.Column(db.String(120))
+    phone = db.Column(db.String(120))
+    # Comma-joined copy of `genres`, kept for the full-text search document.
+    genres_text = db.Column('genres', db.String(120))
+    image_link = db.Column(db.String(500))
+    website_link = db.Column(db.String(120))
+    facebook_link = db.Column(db.String(120))
+    seeking_flag = db.Column(db.Boolean())
+    seeking_description = db.Column(db.String(500))
+    import_hash = db.Column(db.String(32))
+    import_missing_since = db.Column(db.DateTime)
+    # Maintained by show_counts; split at its watermark, not at query time.
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    genres = db.relationship('Genre', secondary=artist_genres, lazy=True, order_by='Genre.name')
+    show = db.relationship('Show', backref=db.backref('artist', lazy=True))
+
+class Show(db.Model):
+    __tablename__ = 'Show'
+    __table_args__ = (
+        db.Index('ix_show_venue_id_date', 'venue_id', 'date'),
+        db.Index('ix_show_artist_id_date', 'artist_id', 'date'),
+        db.Index('ix_show_date', 'date'),
+    )
+
+    # On PostgreSQL the table is range-partitioned by date (partitions.py)
+    # and its primary key is (id, date); id alone still identifies a show.
+    id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.DateTime, nullable=False)
+    venue_id = db.Column(db.Integer, db.ForeignKey("Venue.id"), nullable=False)
+    artist_id = db.Column(db.Integer, db.ForeignKey("Artist.id"), nullable=False)
+    import_hash = db.Column(db.String(32))
+    import_missing_since = db.Column(db.DateTime)
+
+# Single row: the time up to which show_counts has rolled shows over to past.
+show_counts_table = db.Table('show_counts',
+    db.Column('id', db.Integer, primary_key=True),
+    db.Column('rolled_at', db.DateTime, nullable=False),
+)
+show_counts.install(db.session, Show)
+
+db.Index('ix_venue_area_name',
+         sort_key(Venue.city), sort_key(Venue.state), sort_key(Venue.name), Venue.id)
+db.Index('ix_artist_name_id', sort_key(Artist.name), Artist.id)
+
+for model in (Venue, Artist):
+    db.Index('ix_%s_search' % model.__tablename__.lower(), search.document(model.__table__),
+             postgresql_using='gin').ddl_if(dialect='postgresql')
+    search.install(model.__table__)
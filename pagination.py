@@ -0,0 +1,78 @@
+#----------------------------------------------------------------------------#
+# Keyset (cursor) pagination.
+#
+# A page is fetched by comparing the ordering key of the rows against the key
+# of the last (or first) row of the previous page, so every page costs one
+# bounded index range scan no matter how deep into the listing it is.
+#----------------------------------------------------------------------------#
+
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import DateTime, tuple_
+
+
+class Page(object):
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+
+def encode_cursor(direction, values):
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps([direction, values], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, keys):
+    """Return (direction, values) for `cursor`; raises ValueError when malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, values = json.loads(raw)
+    except (TypeError, ValueError) as e:
+        raise ValueError('invalid cursor: %s' % e)
+    if direction not in ('after', 'before') or len(values) != len(keys):
+        raise ValueError('invalid cursor')
+    return direction, [
+        datetime.fromisoformat(v) if isinstance(k.type, DateTime) and v is not None else v
+        for k, v in zip(keys, values)
+    ]
+
+
+def paginate(query, keys, cursor=None, per_page=50, session=None):
+    """Fetch one page of `query` ordered by the ascending, unique `keys`.
+
+    `query` is an ORM Query, or a Core select executed on `session`. Every
+    key column must be selected by `query`. Returns a Page whose cursors are
+    None at either end of the listing.
+    """
+    direction, values = decode_cursor(cursor, keys) if cursor else ('after', None)
+    if direction == 'after':
+        if values is not None:
+            query = query.filter(tuple_(*keys) > tuple_(*values))
+        query = query.order_by(*keys)
+    else:
+        query = query.filter(tuple_(*keys) < tuple_(*values)) \
+            .order_by(*[k.desc() for k in keys])
+
+    query = query.limit(per_page + 1)
+    rows = session.execute(query).all() if session is not None else query.all()
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == 'before':
+        rows.reverse()
+    if not rows:
+        return Page(rows)
+
+    def key_of(row):
+        return [row._mapping[k] for k in keys]
+
+    has_next = more if direction == 'after' else True
+    has_prev = values is not None if direction == 'after' else more
+    return Page(
+        rows,
+        next_cursor=encode_cursor('after', key_of(rows[-1])) if has_next else None,
+        prev_cursor=encode_cursor('before', key_of(rows[0])) if has_prev else None,
+    )
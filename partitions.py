@@ -0,0 +1,242 @@
+#----------------------------------------------------------------------------#
+# Date partitions of Show (PostgreSQL).
+#
+# Show is range-partitioned by date (migration d7e3f1a95b62): one partition
+# per month from the current year up to SHOW_PARTITIONS_AHEAD months past now,
+# one per year before that, and the open-ended Show_before and Show_after
+# catching dates on either side.
+# Queries bounded on date (upcoming shows, a venue's past shows) only touch
+# the partitions they need, so the hot slice stays small however much
+# history piles up.
+#
+# - `flask show-partitions ensure` splits monthly partitions off Show_after
+#   up to SHOW_PARTITIONS_AHEAD months past now, taking along the shows it
+#   held for them. Run it periodically (e.g. daily from cron).
+# - `flask show-partitions archive` takes the partitions that ended more
+#   than SHOW_ARCHIVE_AFTER_MONTHS ago out of Show: detached into the
+#   archive schema (the venue and artist counters stop counting them), or
+#   with --compact merged into one partition per year, still queryable.
+# - `flask show-partitions list` shows the partitions and their sizes.
+#
+# ensure runs in one short transaction; archive takes one per partition (or
+# per year when compacting), each locking Show only while it runs.
+#----------------------------------------------------------------------------#
+
+import re
+from datetime import datetime
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import column, func, select, table, text
+
+import show_counts
+
+PARENT = 'Show'
+BEFORE, AFTER = 'Show_before', 'Show_after'
+ARCHIVE_SCHEMA = 'archive'
+BOUND = re.compile(r"FROM \((?:'([^']+)'|MINVALUE)\) TO \((?:'([^']+)'|MAXVALUE)\)")
+
+
+def month_start(when):
+    return datetime(when.year, when.month, 1)
+
+
+def add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def monthly_name(month):
+    return '%s_%d_%02d' % (PARENT, month.year, month.month)
+
+
+def yearly_name(year):
+    return '%s_%d' % (PARENT, year)
+
+
+def literal(bound, unbounded):
+    return "'%s'" % bound.isoformat(' ') if bound is not None else unbounded
+
+
+def is_partitioned(conn):
+    return conn.dialect.name == 'postgresql' and conn.execute(text(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:name)"), {'name': '"%s"' % PARENT}).scalar()
+
+
+def partitions(conn):
+    """[(name, start, end, bytes)] of Show by start; open bounds are None."""
+    rows = conn.execute(text('''
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), pg_total_relation_size(c.oid)
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:name)'''), {'name': '"%s"' % PARENT}).all()
+    result = []
+    for name, bound, size in rows:
+        start, end = (datetime.fromisoformat(value) if value else None
+                      for value in BOUND.search(bound).groups())
+        result.append((name, start, end, size))
+    return sorted(result, key=lambda p: p[1] or datetime.min)
+
+
+def create_partition(conn, name, start, end, sources=()):
+    """Attach partition `name` for [start, end), moving in the shows of that
+    range from the detached tables `sources`.
+    """
+    conn.execute(text('CREATE TABLE "%s" (LIKE "%s" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)' % (
+        name, PARENT)))
+    for source in sources:
+        conn.execute(text('''
+            WITH moved AS (DELETE FROM "%s" WHERE date >= :start AND date < :end RETURNING *)
+            INSERT INTO "%s" SELECT * FROM moved''' % (source, name)), {'start': start, 'end': end})
+    attach(conn, name, start, end)
+
+
+def attach(conn, name, start, end):
+    conn.execute(text('ALTER TABLE "%s" ATTACH PARTITION "%s" FOR VALUES FROM (%s) TO (%s)' % (
+        PARENT, name, literal(start, 'MINVALUE'), literal(end, 'MAXVALUE'))))
+
+
+def detach(conn, name):
+    conn.execute(text('ALTER TABLE "%s" DETACH PARTITION "%s"' % (PARENT, name)))
+
+
+def ensure_partitions(engine, now=None, ahead=3):
+    """Split monthly partitions off Show_after up to `ahead` months past now's.
+
+    Returns the names of the partitions created.
+    """
+    until = add_months(month_start(now or datetime.now()), ahead + 1)
+    created = []
+    with engine.begin() as conn:
+        start = [start for name, start, end, size in partitions(conn) if name == AFTER][0]
+        if start >= until:
+            return created
+        detach(conn, AFTER)
+        while start < until:
+            end = add_months(start, 1)
+            create_partition(conn, monthly_name(start), start, end, sources=[AFTER])
+            created.append(monthly_name(start))
+            start = end
+        attach(conn, AFTER, until, None)
+    return created
+
+
+def detach_partition(conn, metadata, name):
+    """Move partition `name` to the archive schema and uncount its shows."""
+    rolled_at = show_counts.watermark(conn, metadata, lock='share')
+    detach(conn, name)
+    detached = table(name, column('venue_id'), column('artist_id'), column('date'))
+    deltas = {}
+    for owner, fk in show_counts.OWNERS:
+        for owner_id, upcoming, past in conn.execute(
+                select(detached.c[fk],
+                       func.count().filter(detached.c.date > rolled_at),
+                       func.count().filter(detached.c.date <= rolled_at))
+                .group_by(detached.c[fk])):
+            deltas[(owner, owner_id)] = (-upcoming, -past)
+    show_counts.apply_deltas(conn, metadata, deltas)
+    # Detaching keeps the foreign keys, which would stop archived shows'
+    # venues and artists from being deleted.
+    for constraint, in conn.execute(text(
+            "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:name) AND contype = 'f'"),
+            {'name': '"%s"' % name}).all():
+        conn.execute(text('ALTER TABLE "%s" DROP CONSTRAINT "%s"' % (name, constraint)))
+    conn.execute(text('CREATE SCHEMA IF NOT EXISTS %s' % ARCHIVE_SCHEMA))
+    conn.execute(text('ALTER TABLE "%s" SET SCHEMA %s' % (name, ARCHIVE_SCHEMA)))
+
+
+def compact_year(conn, year, names):
+    """Merge the partitions `names`, all within `year`, into one yearly partition."""
+    for name in names:
+        detach(conn, name)
+    merged = yearly_name(year)
+    if merged in names:
+        conn.execute(text('ALTER TABLE "%s" RENAME TO "%s_old"' % (merged, merged)))
+        names = [name + '_old' if name == merged else name for name in names]
+    create_partition(conn, merged, datetime(year, 1, 1), datetime(year + 1, 1, 1), sources=names)
+    for name in names:
+        conn.execute(text('DROP TABLE "%s"' % name))
+
+
+def archive(engine, metadata, before, compact=False):
+    """Detach (or with `compact`, merge per year) the partitions ending by `before`.
+
+    Returns [(action, name)]. Show_before is kept; compacting merges whole
+    years only. Once a range is detached, shows dated in it can't be added.
+    """
+    with engine.connect() as conn:
+        old = [(name, start, end) for name, start, end, size in partitions(conn)
+               if start is not None and end is not None and end <= before]
+    done = []
+    if not compact:
+        for name, start, end in old:
+            with engine.begin() as conn:
+                detach_partition(conn, metadata, name)
+            done.append(('detached', name))
+        return done
+    years = {}
+    for name, start, end in old:
+        if start.year == (end - datetime.resolution).year:
+            years.setdefault(start.year, []).append(name)
+    for year, names in sorted(years.items()):
+        if datetime(year + 1, 1, 1) > before or names == [yearly_name(year)]:
+            continue
+        with engine.begin() as conn:
+            compact_year(conn, year, names)
+        done.append(('compacted', '%s <- %s' % (yearly_name(year), ', '.join(names))))
+    return done
+
+
+@click.group('show-partitions')
+def show_partitions_command():
+    """Maintain the date partitions of Show."""
+
+
+def partitioned_engine():
+    from models import db
+
+    with db.engine.connect() as conn:
+        if not is_partitioned(conn):
+            raise click.ClickException('Show is not a partitioned table (PostgreSQL, after `flask db upgrade`)')
+    return db.engine
+
+
+@show_partitions_command.command('list')
+@with_appcontext
+def list_command():
+    """List the partitions of Show."""
+    with partitioned_engine().connect() as conn:
+        for name, start, end, size in partitions(conn):
+            bounds = '%s .. %s' % (start.date() if start else '', end.date() if end else '')
+            click.echo('%-20s %-24s %10.1f MiB' % (name, bounds, size / 2 ** 20))
+
+
+@show_partitions_command.command('ensure')
+@click.option('--ahead', type=int, default=None,
+              help='Months past the current one to cover (default SHOW_PARTITIONS_AHEAD).')
+@with_appcontext
+def ensure_command(ahead):
+    """Create the monthly partitions for the coming months."""
+    ahead = current_app.config.get('SHOW_PARTITIONS_AHEAD', 3) if ahead is None else ahead
+    created = ensure_partitions(partitioned_engine(), ahead=ahead)
+    click.echo('Created %s' % ', '.join(created) if created else 'All partitions exist')
+
+
+@show_partitions_command.command('archive')
+@click.option('--before', type=click.DateTime(['%Y-%m-%d']), default=None,
+              help='Take out partitions ending by this date (default SHOW_ARCHIVE_AFTER_MONTHS ago).')
+@click.option('--compact', is_flag=True, help='Merge old partitions per year instead of detaching them.')
+@with_appcontext
+def archive_command(before, compact):
+    """Detach old partitions into the archive schema, or compact them."""
+    from models import db
+
+    engine = partitioned_engine()
+    months = current_app.config.get('SHOW_ARCHIVE_AFTER_MONTHS', 24)
+    before = min(before or add_months(month_start(datetime.now()), -months), month_start(datetime.now()))
+    done = archive(engine, db.metadata, before, compact)
+    for action, name in done:
+        click.echo('%s %s' % (action, name))
+    if not done:
+        click.echo('Nothing to archive before %s' % before.date())
+    elif not compact:
+        show_counts.clear_page_cache()
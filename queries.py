@@ -0,0 +1,241 @@
+#----------------------------------------------------------------------------#
+# Queries.
+#
+# Building blocks of the page and API views: each returns plain dicts and
+# lists ready for a template or json_body.
+#
+# The listing, search and show-section queries are Core selects over the
+# table columns they use, executed on db.session: rows come back as plain
+# tuples without passing through ORM result processing, and no model
+# instances are built for pages that only show a few fields of each row.
+#----------------------------------------------------------------------------#
+
+from datetime import datetime
+from flask import abort, current_app, request, url_for
+from sqlalchemy import select
+from sqlalchemy.sql import func
+
+import pagination
+import search
+from models import db, sort_key, Genre, Venue, Artist, Show
+
+def page_args():
+  # Cursor and page size of a listing request, the size capped by MAX_PAGE_SIZE.
+  per_page = request.args.get('per_page', current_app.config['PAGE_SIZE'], type=int)
+  per_page = max(1, min(per_page, current_app.config['MAX_PAGE_SIZE']))
+  return request.args.get('cursor'), per_page
+
+def page_links(page, per_page):
+  args = dict(request.view_args or {})
+  args.update((k, v) for k, v in request.args.items() if k != 'cursor')
+  if per_page != current_app.config['PAGE_SIZE']:
+    args['per_page'] = per_page
+  return {
+    "next": url_for(request.endpoint, cursor=page.next_cursor, **args) if page.next_cursor else None,
+    "prev": url_for(request.endpoint, cursor=page.prev_cursor, **args) if page.prev_cursor else None,
+  }
+
+def stream_requested():
+  # ?all=1 renders the complete listing as a streamed response instead of a page.
+  return current_app.config.get('STREAM_LISTINGS', True) and request.args.get('all') == '1'
+
+def keyset_page(query, keys):
+  cursor, per_page = page_args()
+  try:
+    page = pagination.paginate(query, keys, cursor, per_page, session=db.session)
+  except ValueError:
+    abort(400)
+  return page, page_links(page, per_page)
+
+def genres_named(names):
+  # Genre rows for `names`, creating the ones that do not exist yet.
+  names = sorted(set(n.strip() for n in names if n.strip()))
+  if not names:
+    return []
+  genres = Genre.query.filter(Genre.name.in_(names)).all()
+  known = set(g.name for g in genres)
+  genres.extend(Genre(name=n) for n in names if n not in known)
+  return genres
+
+def with_genre(query, model, genre):
+  # Restrict `query` to rows of `model` tagged `genre`: an EXISTS probe on the
+  # (genre_id, owner_id) index of the association table.
+  if not genre:
+    return query
+  return query.where(model.genres.any(Genre.name == genre))
+
+def streamed(query, keys):
+  # The whole listing in key order, fetched through a server-side cursor in
+  # STREAM_BATCH_SIZE chunks rather than materialized at once.
+  return db.session.execute(
+    query.order_by(*keys).execution_options(yield_per=current_app.config['STREAM_BATCH_SIZE']))
+
+def fold_areas(rows):
+  # Group area-ordered venue rows into areas, yielding each once complete.
+  area = None
+  for city, state, venue_id, name, num_upcoming_shows in rows:
+    if area is None or (area["city"], area["state"]) != (city, state):
+      if area is not None:
+        yield area
+      area = {"city": city, "state": state, "venues": []}
+    area["venues"].append({
+      "id": venue_id,
+      "name": name,
+      "num_upcoming_shows": num_upcoming_shows,
+    })
+  if area is not None:
+    yield area
+
+def venue_areas(genre=None, stream=False):
+  # One page of venues ordered by area (or, streaming, all of them), each with
+  # its maintained upcoming show count.
+  venue = Venue.__table__
+  city, state, name = (sort_key(venue.c[c]).label(c) for c in ('city', 'state', 'name'))
+  query = select(city, state, venue.c.id, name, venue.c.upcoming_shows_count)
+  query = with_genre(query, Venue, genre)
+  keys = (city, state, name, venue.c.id)
+  if stream:
+    return fold_areas(streamed(query, keys)), None
+  page, links = keyset_page(query, keys)
+  return list(fold_areas(page.items)), links
+
+def artist_listing(genre=None, stream=False):
+  artist = Artist.__table__
+  name = sort_key(artist.c.name).label('name')
+  query = with_genre(select(artist.c.id, name), Artist, genre)
+  keys = (name, artist.c.id)
+  if stream:
+    return ({"id": a.id, "name": a.name} for a in streamed(query, keys)), None
+  page, links = keyset_page(query, keys)
+  return [{"id": a.id, "name": a.name} for a in page.items], links
+
+def show_listing(stream=False):
+  show, venue, artist = Show.__table__, Venue.__table__, Artist.__table__
+  query = select(
+      show.c.id,
+      show.c.date,
+      show.c.venue_id,
+      show.c.artist_id,
+      venue.c.name.label("venue_name"),
+      artist.c.name.label("artist_name"),
+      artist.c.image_link,
+    ).join_from(show, venue, show.c.venue_id == venue.c.id) \
+    .join(artist, show.c.artist_id == artist.c.id)
+  keys = (show.c.date, show.c.id)
+  if stream:
+    rows, links = streamed(query, keys), None
+  else:
+    page, links = keyset_page(query, keys)
+    rows = page.items
+  data = (
+    {
+      "venue_id": s.venue_id,
+      "artist_id": s.artist_id,
+      "start_time": s.date,
+      "venue_name": s.venue_name,
+      "artist_name": s.artist_name,
+      "artist_image_link": s.image_link,
+    } for s in rows)
+  return (data if stream else list(data)), links
+
+def show_sections(criterion, counterpart, limit=None):
+  # Past and upcoming shows matching `criterion`, joined with the id, name and
+  # image of the `counterpart` model (Venue or Artist). Each section is one
+  # query; the window count carries the section total past the LIMIT.
+  prefix = counterpart.__tablename__.lower()
+  show, other = Show.__table__, counterpart.__table__
+  now = datetime.now()
+  sections = {}
+  for section, condition, order in (
+      ("past", show.c.date <= now, show.c.date.desc()),
+      ("upcoming", show.c.date > now, show.c.date.asc())):
+    query = select(
+        other.c.id,
+        other.c.name,
+        other.c.image_link,
+        show.c.date,
+        func.count().over(),
+      ).join_from(show, other) \
+      .where(criterion, condition) \
+      .order_by(order, show.c.id)
+    if limit is not None:
+      query = query.limit(limit)
+    rows = db.session.execute(query).all()
+
+    sections[section + "_shows"] = [{
+      prefix + "_id": row[0],
+      prefix + "_name": row[1],
+      prefix + "_image_link": row[2],
+      "start_time": row[3],
+    } for row in rows]
+    sections[section + "_shows_count"] = rows[0][4] if rows else 0
+  return sections
+
+def venue_detail(venue_id):
+  v = Venue.query.get_or_404(venue_id)
+  sections = show_sections(Show.__table__.c.venue_id == v.id, Artist, limit=current_app.config.get('DETAIL_SHOWS_LIMIT'))
+
+  data = {
+    "id": v.id,
+    "name": v.name,
+    "genres": [g.name for g in v.genres],
+    "address": v.address,
+    "city": v.city,
+    "state": v.state,
+    "phone": v.phone,
+    "website": v.website_link,
+    "facebook_link": v.facebook_link,
+    "seeking_talent": v.seeking_flag,
+    "seeking_description": v.seeking_description,
+    "image_link": v.image_link,
+    **sections,
+  }
+  return data
+
+def artist_detail(artist_id):
+  a = Artist.query.get_or_404(artist_id)
+  sections = show_sections(Show.__table__.c.artist_id == a.id, Venue, limit=current_app.config.get('DETAIL_SHOWS_LIMIT'))
+
+  data = {
+    "id": a.id,
+    "name": a.name,
+    "genres": [g.name for g in a.genres],
+    "city": a.city,
+    "state": a.state,
+    "phone": a.phone,
+    "website": a.website_link,
+    "facebook_link": a.facebook_link,
+    "seeking_venue": a.seeking_flag,
+    "seeking_description": a.seeking_description,
+    "image_link": a.image_link,
+    **sections,
+  }
+  return data
+
+def search_records(model, term, limit=None, genre=None):
+  # Ranked matches on name, city and genres with their upcoming show counts;
+  # the window count reports the total number of matches beyond the limit.
+  if limit is None:
+    limit = current_app.config.get('SEARCH_RESULTS_LIMIT')
+  table = model.__table__
+  matches = search.matches(table, term, db.engine.dialect.name).subquery()
+  query = select(
+      table.c.id,
+      table.c.name,
+      table.c.upcoming_shows_count,
+      func.count().over(),
+    ).join_from(table, matches, matches.c.id == table.c.id)
+  query = with_genre(query, model, genre) \
+    .order_by(matches.c.rank.desc(), table.c.name, table.c.id)
+  if limit is not None:
+    query = query.limit(limit)
+  rows = db.session.execute(query).all()
+
+  return {
+    "count": rows[0][3] if rows else 0,
+    "data": [{
+      "id": row[0],
+      "name": row[1],
+      "num_upcoming_shows": row[2],
+    } for row in rows],
+  }
@@ -0,0 +1,144 @@
+#----------------------------------------------------------------------------#
+# Query budgets: catch N+1 patterns before they reach production.
+#
+# Statements are recorded while a budget is active, either around a block of
+# code (tests) or around each request whose view declares a budget (debug
+# mode). A budget fails when more statements run than declared, or when the
+# same SQL runs more than `max_repeats` times with different parameters -
+# the signature of a lazy load inside a loop.
+#
+#   with query_budget(2):
+#       client.get('/venues')
+#
+#   @app.route('/venues')
+#   @budget.declare(1)
+#   def venues(): ...
+#
+# Views that repeat statements on purpose (batched deletes) opt out with
+# @budget.exempt.
+#----------------------------------------------------------------------------#
+
+import contextvars
+import functools
+from collections import Counter
+from flask import current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_recorders = contextvars.ContextVar('fyyur_query_recorders', default=())
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryRecorder(object):
+
+    def __init__(self, max_statements=None, max_repeats=3, label='block'):
+        self.max_statements = max_statements
+        self.max_repeats = max_repeats
+        self.label = label
+        self.statements = []
+        self._token = None
+
+    def __enter__(self):
+        install()
+        self._token = _recorders.set(_recorders.get() + (self,))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _recorders.reset(self._token)
+        if exc_type is None:
+            self.check()
+        return False
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with QueryRecorder(self.max_statements, self.max_repeats, func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def repeated(self):
+        return [(sql, n) for sql, n in Counter(self.statements).most_common()
+                if self.max_repeats is not None and n > self.max_repeats]
+
+    def problems(self):
+        problems = []
+        if self.max_statements is not None and len(self.statements) > self.max_statements:
+            problems.append('%d statements, budget %d' % (len(self.statements), self.max_statements))
+        for sql, n in self.repeated():
+            problems.append('%d executions of: %s' % (n, ' '.join(sql.split())[:200]))
+        return problems
+
+    def check(self):
+        problems = self.problems()
+        if problems:
+            raise QueryBudgetExceeded('%s exceeded its query budget: %s' % (self.label, '; '.join(problems)))
+
+
+def query_budget(max_statements=None, max_repeats=3):
+    """Context manager / decorator failing when the wrapped code exceeds the budget."""
+    return QueryRecorder(max_statements, max_repeats)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    for recorder in _recorders.get():
+        recorder.statements.append(statement)
+
+
+def install():
+    if not event.contains(Engine, 'before_cursor_execute', before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+
+
+class QueryBudget(object):
+    """Checks each request against the budget declared by its view.
+
+    QUERY_BUDGET_MODE is None (off), 'warn' (log) or 'raise'.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        install()
+        app.before_request(self.start)
+        app.after_request(self.finish)
+
+    def declare(self, max_statements, max_repeats=None):
+        def decorator(view):
+            view.query_budget = (max_statements, max_repeats)
+            return view
+        return decorator
+
+    def exempt(self, view):
+        view.query_budget_exempt = True
+        return view
+
+    def start(self):
+        if not current_app.config.get('QUERY_BUDGET_MODE'):
+            return
+        view = current_app.view_functions.get(request.endpoint)
+        if getattr(view, 'query_budget_exempt', False):
+            return
+        max_statements, max_repeats = getattr(view, 'query_budget', (None, None))
+        max_repeats = max_repeats or current_app.config.get('QUERY_BUDGET_MAX_REPEATS', 3)
+        recorder = QueryRecorder(max_statements, max_repeats, request.endpoint)
+        g.query_budget_token = _recorders.set(_recorders.get() + (recorder,))
+        g.query_budget = recorder
+
+    def finish(self, response):
+        recorder = g.pop('query_budget', None)
+        if recorder is None:
+            return response
+        _recorders.reset(g.pop('query_budget_token'))
+        problems = recorder.problems()
+        if problems:
+            message = '%s %s exceeded its query budget: %s' % (
+                request.method, request.full_path, '; '.join(problems))
+            if current_app.config['QUERY_BUDGET_MODE'] == 'raise':
+                raise QueryBudgetExceeded(message)
+            current_app.logger.warning(message)
+        return response
@@ -1,111 +1,286 @@
 #----------------------------------------------------------------------------#
-# Imports
+# Bulk CSV import.
+#
+# Streams the ';'-delimited venue, artist and show CSVs in batches and loads
+# them with COPY on Postgres or executemany inserts elsewhere, using the
+# models from models.py.
+#
+# Every row is stored with a hash of its source fields. An incremental run
+# upserts by id, skips rows whose hash is unchanged and deletes or flags rows
+# that are no longer in the source. Both end by recomputing the show
+# counters on Venue and Artist (show_counts.recount).
+#
+#   flask import --batch-size 5000
+#   flask import --incremental --missing flag
 #----------------------------------------------------------------------------#
 
+import csv
+import hashlib
+import io
 import json
-import dateutil.parser
-from flask import Flask, render_template, request, Response, flash, redirect, url_for
-from flask_sqlalchemy import SQLAlchemy
-import pandas as pd
-#----------------------------------------------------------------------------#
-# App Config.
-#----------------------------------------------------------------------------#
+import time
+from datetime import datetime
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import Boolean, DateTime, Integer, bindparam, select
 
-app = Flask(__name__)
-app.config.from_object('config')
-db = SQLAlchemy(app)
+import show_counts
+from models import db, Venue, Artist, Show
+
+DATE_FORMATS = ('%d.%m.%Y %H:%M', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S')
+TRUE_VALUES = ('true', 't', 'yes', 'y', '1')
+
+
+def parse_datetime(value):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    raise ValueError('unrecognised date %r' % value)
+
+
+def converter(column):
+    if isinstance(column.type, Integer):
+        return int
+    if isinstance(column.type, Boolean):
+        return lambda value: value.strip().lower() in TRUE_VALUES
+    if isinstance(column.type, DateTime):
+        return parse_datetime
+    return str
+
+
+def row_hash(row):
+    values = [row[name] for name in sorted(row)]
+    return hashlib.md5(json.dumps(values, default=str).encode()).hexdigest()
+
+
+def read_batches(path, table, batch_size):
+    """Yield lists of row dicts for the columns of `table` found in `path`."""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f, delimiter=';')
+        header = next(reader, None)
+        if header is None:
+            return
+        header = [name.strip() for name in header]
+        fields = [(i, name, converter(table.c[name]))
+                  for i, name in enumerate(header) if name in table.c]
+        batch = []
+        for record in reader:
+            if not any(record):
+                continue
+            row = {
+                name: convert(record[i]) if i < len(record) and record[i] != '' else None
+                for i, name, convert in fields
+            }
+            if 'import_hash' in table.c:
+                row['import_hash'] = row_hash(row)
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def copy_rows(conn, table, rows):
+    # COPY ... FROM STDIN through psycopg2; None is written as an unquoted
+    # empty field, which CSV-format COPY reads as NULL.
+    columns = list(rows[0])
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow([row[c] for c in columns])
+    buf.seek(0)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert('COPY "%s" (%s) FROM STDIN WITH (FORMAT csv)' % (
+            table.name, ', '.join('"%s"' % c for c in columns)), buf)
+    finally:
+        cursor.close()
+
+
+def split_genres(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def link_genres(conn, table, rows):
+    """Replace the genre links of `rows` from their comma-joined genres field."""
+    links = table.metadata.tables.get(table.name.lower() + '_genres')
+    if links is None or not rows or 'genres' not in rows[0]:
+        return
+    genre = table.metadata.tables['Genre']
+    owner = links.c[table.name.lower() + '_id']
+    names = set(name for row in rows for name in split_genres(row['genres']))
+    ids = dict(conn.execute(select(genre.c.name, genre.c.id).where(genre.c.name.in_(names))).all())
+    new = [{'name': name} for name in sorted(names) if name not in ids]
+    if new:
+        conn.execute(genre.insert(), new)
+        ids = dict(conn.execute(select(genre.c.name, genre.c.id).where(genre.c.name.in_(names))).all())
+    conn.execute(links.delete().where(owner.in_([row['id'] for row in rows])))
+    pairs = set((row['id'], ids[name]) for row in rows for name in split_genres(row['genres']))
+    if pairs:
+        conn.execute(links.insert(), [{owner.key: owner_id, 'genre_id': genre_id}
+                                      for owner_id, genre_id in sorted(pairs)])
+
+
+def supports_copy(conn):
+    if conn.dialect.name != 'postgresql':
+        return False
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        return hasattr(cursor, 'copy_expert')
+    finally:
+        cursor.close()
+
+
+def load_file(conn, path, table, batch_size):
+    return load_rows(conn, table, read_batches(path, table, batch_size))
+
+
+def load_rows(conn, table, batches):
+    """Insert batches of row dicts into `table`; returns (rows, seconds)."""
+    use_copy = supports_copy(conn)
+    loaded = 0
+    started = time.perf_counter()
+    for rows in batches:
+        if use_copy:
+            copy_rows(conn, table, rows)
+        else:
+            conn.execute(table.insert(), rows)
+        link_genres(conn, table, rows)
+        loaded += len(rows)
+        elapsed = time.perf_counter() - started
+        click.echo('  %s: %d rows (%.0f rows/s)' % (table.name, loaded, loaded / elapsed if elapsed else 0))
+    if loaded:
+        sync_sequence(conn, table)
+    return loaded, time.perf_counter() - started
+
+
+def sync_sequence(conn, table):
+    # Ids come from the CSV, so move the serial sequence past them.
+    if conn.dialect.name == 'postgresql':
+        conn.exec_driver_sql(
+            "SELECT setval(pg_get_serial_sequence('\"%s\"', 'id'), "
+            "(SELECT max(id) FROM \"%s\"))" % (table.name, table.name))
+
+
+def upsert_file(conn, path, table, batch_size, seen):
+    """Insert new ids, update ids whose hash changed and skip the rest."""
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    update = None
+    for rows in read_batches(path, table, batch_size):
+        existing = dict(
+            (id, (import_hash, missing_since)) for id, import_hash, missing_since in conn.execute(
+                select(table.c.id, table.c.import_hash, table.c.import_missing_since)
+                .where(table.c.id.in_([row['id'] for row in rows]))))
+        inserts, updates = [], []
+        for row in rows:
+            seen.add(row['id'])
+            if row['id'] not in existing:
+                inserts.append(row)
+            elif existing[row['id']] == (row['import_hash'], None):
+                counts['unchanged'] += 1
+            else:
+                updates.append(dict(row, _id=row['id'], import_missing_since=None))
+        if inserts:
+            conn.execute(table.insert(), inserts)
+        if updates:
+            if update is None:
+                update = table.update().where(table.c.id == bindparam('_id'))
+            conn.execute(update, updates)
+        link_genres(conn, table, inserts + updates)
+        counts['inserted'] += len(inserts)
+        counts['updated'] += len(updates)
+    return counts
+
+
+def prune_missing(conn, table, seen, mode, batch_size):
+    """Delete or flag the rows of `table` whose id was not in the source."""
+    query = select(table.c.id)
+    if mode == 'flag':
+        query = query.where(table.c.import_missing_since.is_(None))
+    missing = [id for (id,) in conn.execute(query) if id not in seen]
+    now = datetime.now()
+    for start in range(0, len(missing), batch_size):
+        ids = missing[start:start + batch_size]
+        if mode == 'delete':
+            links = table.metadata.tables.get(table.name.lower() + '_genres')
+            if links is not None:
+                conn.execute(links.delete().where(links.c[table.name.lower() + '_id'].in_(ids)))
+            conn.execute(table.delete().where(table.c.id.in_(ids)))
+        else:
+            conn.execute(table.update().where(table.c.id.in_(ids)).values(import_missing_since=now))
+    return len(missing)
+
+
+def import_data(sources, batch_size=5000):
+    """Load each (path, model) pair in order, one transaction per file."""
+    total, total_time = 0, 0.0
+    for path, model in sources:
+        click.echo('Importing %s into %s' % (path, model.__tablename__))
+        with db.engine.begin() as conn:
+            loaded, elapsed = load_file(conn, path, model.__table__, batch_size)
+        total += loaded
+        total_time += elapsed
+    with db.engine.begin() as conn:
+        show_counts.recount(conn, db.metadata)
+    click.echo('Imported %d rows in %.2fs (%.0f rows/s)' % (
+        total, total_time, total / total_time if total_time else 0))
+    return total
+
+
+def import_incremental(sources, batch_size=5000, missing='keep'):
+    """Upsert each (path, model) pair, then handle rows absent from the source.
+
+    `missing` is 'keep', 'flag' (set import_missing_since) or 'delete'. Rows
+    are pruned in reverse order so shows go before their venues and artists.
+    """
+    report = []
+    with db.engine.begin() as conn:
+        for path, model in sources:
+            seen = set()
+            counts = upsert_file(conn, path, model.__table__, batch_size, seen)
+            report.append((model, seen, counts))
+        for model, seen, counts in reversed(report):
+            counts['missing'] = 0
+            if missing != 'keep':
+                counts['missing'] = prune_missing(conn, model.__table__, seen, missing, batch_size)
+        for model, seen, counts in report:
+            sync_sequence(conn, model.__table__)
+        show_counts.recount(conn, db.metadata)
+
+    missing_label = {'delete': 'deleted', 'flag': 'flagged'}.get(missing, 'missing')
+    for model, seen, counts in report:
+        click.echo('%-8s %8d inserted %8d updated %8d unchanged %8d %s' % (
+            model.__tablename__, counts['inserted'], counts['updated'],
+            counts['unchanged'], counts['missing'], missing_label))
+    return dict((model.__tablename__, counts) for model, seen, counts in report)
+
+
+@click.command('import')
+@click.option('--venues', default='venue_data.csv', type=click.Path(dir_okay=False), show_default=True)
+@click.option('--artists', default='artist_data.csv', type=click.Path(dir_okay=False), show_default=True)
+@click.option('--shows', default='show_data.csv', type=click.Path(dir_okay=False), show_default=True)
+@click.option('--batch-size', default=5000, show_default=True, help='Rows per insert batch.')
+@click.option('--incremental', is_flag=True, help='Upsert by id and skip unchanged rows.')
+@click.option('--missing', type=click.Choice(['keep', 'flag', 'delete']), default='keep',
+              show_default=True, help='With --incremental, what to do with rows not in the CSVs.')
+@with_appcontext
+def import_command(venues, artists, shows, batch_size, incremental, missing):
+    """Bulk-load the venue, artist and show CSVs."""
+    sources = [(venues, Venue), (artists, Artist), (shows, Show)]
+    if incremental:
+        import_incremental(sources, batch_size, missing)
+    else:
+        import_data(sources, batch_size)
+    page_cache = current_app.extensions.get('page_cache')
+    if page_cache is not None:
+        page_cache.clear()
 
-#----------------------------------------------------------------------------#
-# Models.
-#----------------------------------------------------------------------------#
 
-class Venue(db.Model):
-    __tablename__ = 'Venue'
-
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String)
-    city = db.Column(db.String(120))
-    state = db.Column(db.String(120))
-    address = db.Column(db.String(120))
-    phone = db.Column(db.String(120))
-    genres = db.Column(db.String(120))
-    image_link = db.Column(db.String(500))
-    website_link = db.Column(db.String(120))
-    facebook_link = db.Column(db.String(120))
-    seeking_flag = db.Column(db.Boolean())
-    show = db.relationship('Show', backref=db.backref('venue', lazy=True))
-
-class Artist(db.Model):
-    __tablename__ = 'Artist'
-
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String)
-    city = db.Column(db.String(120))
-    state = db.Column(db.String(120))
-    phone = db.Column(db.String(120))
-    genres = db.Column(db.String(120))
-    image_link = db.Column(db.String(500))
-    website_link = db.Column(db.String(120))
-    facebook_link = db.Column(db.String(120))
-    seeking_flag = db.Column(db.Boolean())
-    show = db.relationship('Show', backref=db.backref('artist', lazy=True))
-
-class Show(db.Model):
-    __tablename__ = 'Show'
-
-    id = db.Column(db.Integer, primary_key=True)
-    date = db.Column(db.DateTime)
-    venue_id = db.Column(db.Integer, db.ForeignKey("Venue.id"), nullable=False)
-    artist_id = db.Column(db.Integer, db.ForeignKey("Artist.id"), nullable=False)
-
-df_venues = pd.read_csv("venue_data.csv", delimiter=";")
-df_artists = pd.read_csv("artist_data.csv", delimiter=";")
-df_shows = pd.read_csv("show_data.csv", delimiter=";")
-
-
-for v in df_venues.iterrows():
-    v = v[1]
-    venue = Venue(
-        id = v["id"],
-        name = v["name"],
-        city = v["city"],
-        state = v["state"],
-        address = v["address"],
-        phone = v["phone"],
-        genres = v["genres"],
-        image_link = v["image_link"],
-        website_link = v["website_link"],
-        facebook_link = v["facebook_link"],
-        seeking_flag = v["seeking_flag"],
-    )
-    db.session.add(venue)
-
-
-for a in df_artists.iterrows():
-    a = a[1]
-    artist = Artist(
-        id = a["id"],
-        name = a["name"],
-        city = a["city"],
-        state = a["state"],
-        phone = a["phone"],
-        genres = v["genres"],
-        image_link = a["image_link"],
-        website_link = a["website_link"],
-        facebook_link = a["facebook_link"],
-        seeking_flag = a["seeking_flag"],
-    )
-    db.session.add(artist)
-
-for s in df_shows.iterrows():
-    s = s[1]
-    show = Show(
-        id = s["id"],
-        date = s["date"],
-        venue_id = s["venue_id"],
-        artist_id = s["artist_id"],
-    )
-    db.session.add(show)
-    
-
-db.session.commit()
\ No newline at end of file
+if __name__ == '__main__':
+    from app import app
+    with app.app_context():
+        import_command.main(standalone_mode=True)
@@ -0,0 +1,86 @@
+#----------------------------------------------------------------------------#
+# Read-replica routing.
+#
+# Views marked @replicas.reads (listings, detail pages, searches) run their
+# queries on one of the SQLALCHEMY_REPLICA_URIS, picked at random per
+# request; everything else, and anything flushed, goes to the primary:
+#
+#   @bp.route('/venues')
+#   @replicas.reads
+#   def venues(): ...
+#
+# A request that commits sets a cookie keeping that client on the primary
+# for REPLICA_STICKY_SECONDS, so it reads its own writes past the
+# replication lag. With no replicas configured every query uses the primary.
+#----------------------------------------------------------------------------#
+
+import random
+import time
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+from werkzeug.http import parse_cookie
+
+STICKY_COOKIE = 'fyyur_primary_until'
+
+
+class RoutingSession(Session):
+    """Session that reads through `info['replica']` when a request set one."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get('replica')
+        if replica is not None and bind is None and not self._flushing:
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class Replicas(object):
+
+    def __init__(self, app=None):
+        self.engines = []
+        self.sticky_seconds = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from config import engine_options
+        from metrics import instrument_pool
+
+        self.engines = [create_engine(uri, **instrument_pool(engine_options(uri)))
+                        for uri in app.config.get('SQLALCHEMY_REPLICA_URIS') or ()]
+        self.sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 10)
+        if self.engines:
+            session = app.extensions['sqlalchemy'].session
+            event.listen(session, 'after_commit', self.wrote)
+            app.before_request(self.start)
+            app.after_request(self.finish)
+        app.extensions['replicas'] = self
+
+    def reads(self, view):
+        view.read_replica = True
+        return view
+
+    def sticky(self, cookies):
+        # Whether the client wrote recently; `cookies` is a request's cookies.
+        try:
+            return float(cookies.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def sticky_environ(self, environ):
+        return bool(self.engines) and self.sticky(parse_cookie(environ))
+
+    def start(self):
+        view = current_app.view_functions.get(request.endpoint)
+        if getattr(view, 'read_replica', False) and not self.sticky(request.cookies):
+            current_app.extensions['sqlalchemy'].session().info['replica'] = random.choice(self.engines)
+
+    def wrote(self, session=None):
+        if has_request_context():
+            g.replica_wrote = True
+
+    def finish(self, response):
+        if g.pop('replica_wrote', False) and self.sticky_seconds:
+            response.set_cookie(STICKY_COOKIE, '%.3f' % (time.time() + self.sticky_seconds),
+                                max_age=self.sticky_seconds, httponly=True, samesite='Lax')
+        return response
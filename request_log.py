@@ -0,0 +1,72 @@
+#----------------------------------------------------------------------------#
+# Request capture for load replay.
+#
+# When REQUEST_LOG_PATH is set, every request outside REQUEST_LOG_SKIP is
+# appended to that file as one JSON line:
+#
+#   {"ts": 1700000000.123, "method": "POST", "path": "/venues/search",
+#    "form": {"search_term": ["hall"]}, "status": 200, "duration_ms": 8.41}
+#
+# `ts` is the wall-clock start, so benchmarks/replay.py can reproduce the
+# original arrival pattern. CSRF tokens are not recorded.
+#----------------------------------------------------------------------------#
+
+import json
+import os
+import threading
+import time
+from flask import g, request
+
+FORM_SKIP = ('csrf_token',)
+
+
+class RequestLog(object):
+
+    def __init__(self, app=None):
+        self.path = None
+        self._file = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.path = app.config.get('REQUEST_LOG_PATH')
+        self.skip = tuple(app.config.get('REQUEST_LOG_SKIP', ('/static/', '/metrics')))
+        if self.path:
+            app.before_request(self.start)
+            app.after_request(self.finish)
+        app.extensions['request_log'] = self
+
+    def start(self):
+        g.request_log_started = (time.time(), time.perf_counter())
+
+    def finish(self, response):
+        started = g.pop('request_log_started', None)
+        if started is None or request.path.startswith(self.skip):
+            return response
+        ts, perf = started
+        record = {
+            'ts': round(ts, 3),
+            'method': request.method,
+            'path': request.full_path if request.query_string else request.path,
+            'form': dict((k, v) for k, v in request.form.lists() if k not in FORM_SKIP),
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - perf) * 1e3, 3),
+        }
+        self.write(record)
+        return response
+
+    def write(self, record):
+        line = json.dumps(record, sort_keys=True) + '\n'
+        with self._lock:
+            if self._file is None:
+                if os.path.dirname(self.path):
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._file = open(self.path, 'a', buffering=1)
+            self._file.write(line)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,82 @@
+#----------------------------------------------------------------------------#
+# Indexed search over the name, city and genres of a table.
+#
+# Postgres matches a GIN-indexed tsvector expression (prefix terms, so it
+# works while typing) or the pg_trgm-indexed name for infix matches. SQLite
+# keeps an external-content FTS5 table in sync with triggers.
+#----------------------------------------------------------------------------#
+
+import re
+from sqlalchemy import DDL, event, func, literal, literal_column, or_, select, table, column
+from sqlalchemy import text as sql_text
+
+SEARCH_COLUMNS = ('name', 'city', 'genres')
+
+
+def document(tbl):
+    # Must stay identical to the indexed expression for Postgres to use it, so
+    # constants are inlined rather than bound and only immutable functions
+    # (no concat_ws) are used.
+    expr = None
+    for c in SEARCH_COLUMNS:
+        value = func.coalesce(tbl.c[c], sql_text("''"))
+        expr = value if expr is None else expr.op('||')(sql_text("' '")).op('||')(value)
+    return func.to_tsvector(sql_text("'simple'::regconfig"), expr)
+
+
+def fts_name(tbl):
+    return tbl.name.lower() + '_fts'
+
+
+def fts_ddl(tbl):
+    fts = fts_name(tbl)
+    cols = ', '.join(SEARCH_COLUMNS)
+    new = ', '.join('new.' + c for c in SEARCH_COLUMNS)
+    old = ', '.join('old.' + c for c in SEARCH_COLUMNS)
+    delete = "INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old});"
+    insert = "INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new});"
+    statements = [
+        "CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='id')",
+        "CREATE TRIGGER {fts}_ai AFTER INSERT ON \"{table}\" BEGIN " + insert + " END",
+        "CREATE TRIGGER {fts}_ad AFTER DELETE ON \"{table}\" BEGIN " + delete + " END",
+        "CREATE TRIGGER {fts}_au AFTER UPDATE ON \"{table}\" BEGIN " + delete + " " + insert + " END",
+    ]
+    return [s.format(fts=fts, cols=cols, new=new, old=old, table=tbl.name) for s in statements]
+
+
+def install(tbl):
+    """Create the search structures alongside `tbl` (metadata.create_all)."""
+    for statement in fts_ddl(tbl):
+        event.listen(tbl, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+    event.listen(tbl, 'before_drop',
+                 DDL('DROP TABLE IF EXISTS ' + fts_name(tbl)).execute_if(dialect='sqlite'))
+
+
+def terms(term):
+    return re.findall(r'\w+', term or '')
+
+
+def matches(tbl, term, dialect):
+    """Select of (id, rank) for rows of `tbl` matching `term`, higher rank first."""
+    words = terms(term)
+    if not words:
+        return select(tbl.c.id.label('id'), literal(0.0).label('rank'))
+
+    if dialect == 'postgresql':
+        query = func.to_tsquery('simple', ' & '.join(w + ':*' for w in words))
+        doc = document(tbl)
+        return select(
+            tbl.c.id.label('id'),
+            (func.ts_rank(doc, query) + func.similarity(tbl.c.name, term)).label('rank'),
+        ).where(or_(doc.op('@@')(query), tbl.c.name.ilike('%' + term + '%')))
+
+    if dialect == 'sqlite':
+        fts = table(fts_name(tbl), column('rowid'), column('rank'))
+        query = ' '.join('"%s"*' % w for w in words)
+        return select(
+            fts.c.rowid.label('id'),
+            (-fts.c.rank).label('rank'),
+        ).where(literal_column(fts.name).op('MATCH')(query))
+
+    return select(tbl.c.id.label('id'), literal(0.0).label('rank')) \
+        .where(or_(*[tbl.c[c].ilike('%' + term + '%') for c in SEARCH_COLUMNS]))
@@ -0,0 +1,237 @@
+#----------------------------------------------------------------------------#
+# Maintained past/upcoming show counters on Venue and Artist.
+#
+# The counters split shows at a single watermark, show_counts.rolled_at,
+# rather than at "now": a show is upcoming while its date is after the
+# watermark. That keeps them exact between roll-overs:
+#
+# - ORM flushes adding, deleting or moving a Show adjust the counters of its
+#   venue and artist in the same transaction (install()).
+# - `flask show-counts roll`, run periodically, moves the shows dated between
+#   the watermark and now from upcoming to past and advances the watermark.
+# - `flask show-counts check [--repair]` recomputes the counters from Show
+#   and reports (or fixes) rows that drifted, e.g. after raw SQL edits.
+#
+# Bulk imports bypass the ORM and call recount() when they finish.
+# Watermark readers take a shared lock and the roll-over an exclusive one on
+# Postgres, so a show created while the roll-over runs is never missed.
+#----------------------------------------------------------------------------#
+
+from datetime import datetime
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, event, func, inspect, or_, select
+
+# (owner table, Show column referencing it)
+OWNERS = (('Venue', 'venue_id'), ('Artist', 'artist_id'))
+WATERMARK_ID = 1
+
+
+def tables(metadata):
+    return metadata.tables['Show'], metadata.tables['show_counts']
+
+
+def watermark(conn, metadata, lock=None):
+    """The roll-over watermark, created at now if missing.
+
+    `lock` is None, 'share' (writers adjusting counters) or 'update' (the
+    roll-over and repairs).
+    """
+    show, state = tables(metadata)
+    query = select(state.c.rolled_at).where(state.c.id == WATERMARK_ID)
+    if lock is not None and conn.dialect.name == 'postgresql':
+        query = query.with_for_update(read=(lock == 'share'))
+    rolled_at = conn.execute(query).scalar()
+    if rolled_at is None:
+        rolled_at = datetime.now()
+        conn.execute(state.insert().values(id=WATERMARK_ID, rolled_at=rolled_at))
+    return rolled_at
+
+
+def set_watermark(conn, metadata, rolled_at):
+    show, state = tables(metadata)
+    watermark(conn, metadata, lock='update')
+    conn.execute(state.update().where(state.c.id == WATERMARK_ID).values(rolled_at=rolled_at))
+
+
+def apply_deltas(conn, metadata, deltas):
+    """Apply {(owner, id): (upcoming, past)} as relative counter updates."""
+    for owner, fk in OWNERS:
+        table = metadata.tables[owner]
+        rows = [{'_id': id, '_upcoming': upcoming, '_past': past}
+                for (name, id), (upcoming, past) in sorted(deltas.items())
+                if name == owner and (upcoming or past)]
+        if rows:
+            conn.execute(
+                table.update().where(table.c.id == bindparam('_id')).values(
+                    upcoming_shows_count=table.c.upcoming_shows_count + bindparam('_upcoming'),
+                    past_shows_count=table.c.past_shows_count + bindparam('_past')),
+                rows)
+
+
+def show_deltas(shows, rolled_at, sign, deltas):
+    # shows: (venue_id, artist_id, date) tuples
+    for venue_id, artist_id, date in shows:
+        if isinstance(date, str):
+            import dateutil.parser
+            date = dateutil.parser.parse(date)
+        upcoming = date is not None and date > rolled_at
+        for (owner, fk), owner_id in zip(OWNERS, (venue_id, artist_id)):
+            if owner_id is None:
+                continue
+            counts = deltas.get((owner, owner_id), (0, 0))
+            deltas[(owner, owner_id)] = (counts[0] + sign * upcoming, counts[1] + sign * (not upcoming))
+
+
+def counted(obj, history=False):
+    # (venue_id, artist_id, date) of a Show; with history, its values before
+    # this flush and whether any of them changed.
+    if not history:
+        return obj.venue_id, obj.artist_id, obj.date
+    state = inspect(obj)
+    old, changed = [], False
+    for key in ('venue_id', 'artist_id', 'date'):
+        hist = state.attrs[key].history
+        changed = changed or bool(hist.deleted or hist.added)
+        old.append(hist.deleted[0] if hist.deleted else (hist.unchanged or [None])[0])
+    return tuple(old), changed
+
+
+def install(session, model):
+    """Keep the counters in step with ORM changes to `model` (Show)."""
+
+    @event.listens_for(session, 'before_flush')
+    def before_flush(session, flush_context, instances):
+        # Deleted shows are read before the flush removes their rows.
+        deleted = [counted(obj) for obj in session.deleted if isinstance(obj, model)]
+        if deleted:
+            session.info.setdefault('show_counts_deleted', []).extend(deleted)
+
+    @event.listens_for(session, 'after_flush')
+    def after_flush(session, flush_context):
+        added = [counted(obj) for obj in session.new if isinstance(obj, model)]
+        removed = session.info.pop('show_counts_deleted', [])
+        for obj in session.dirty:
+            if isinstance(obj, model) and obj not in session.deleted:
+                old, changed = counted(obj, history=True)
+                if changed:
+                    removed.append(old)
+                    added.append(counted(obj))
+        if not added and not removed:
+            return
+        conn = session.connection()
+        metadata = model.metadata
+        rolled_at = watermark(conn, metadata, lock='share')
+        deltas = {}
+        show_deltas(added, rolled_at, 1, deltas)
+        show_deltas(removed, rolled_at, -1, deltas)
+        apply_deltas(conn, metadata, deltas)
+
+    @event.listens_for(session, 'after_rollback')
+    def after_rollback(session):
+        session.info.pop('show_counts_deleted', None)
+
+
+def roll(conn, metadata, now=None):
+    """Move shows dated between the watermark and `now` to past; returns how many."""
+    show, state = tables(metadata)
+    now = now or datetime.now()
+    rolled_at = watermark(conn, metadata, lock='update')
+    if now <= rolled_at:
+        return 0
+    due = show.c.date > rolled_at, show.c.date <= now
+    deltas = {}
+    for owner, fk in OWNERS:
+        for owner_id, n in conn.execute(
+                select(show.c[fk], func.count()).where(*due).group_by(show.c[fk])):
+            deltas[(owner, owner_id)] = (-n, n)
+    apply_deltas(conn, metadata, deltas)
+    moved = sum(past for (owner, id), (upcoming, past) in deltas.items() if owner == OWNERS[0][0])
+    conn.execute(state.update().where(state.c.id == WATERMARK_ID).values(rolled_at=now))
+    return moved
+
+
+def computed(metadata, owner, fk, rolled_at):
+    show = metadata.tables['Show']
+    table = metadata.tables[owner]
+    upcoming = select(func.count()).where(show.c[fk] == table.c.id, show.c.date > rolled_at) \
+        .scalar_subquery()
+    past = select(func.count()).where(show.c[fk] == table.c.id, show.c.date <= rolled_at) \
+        .scalar_subquery()
+    return table, upcoming, past
+
+
+def drift(conn, metadata, repair=False, limit=20):
+    """Rows whose counters differ from Show, per owner, repaired on request.
+
+    Returns {owner: (number of drifted rows, sample of (id, stored, actual))}.
+    """
+    rolled_at = watermark(conn, metadata, lock='update' if repair else None)
+    report = {}
+    for owner, fk in OWNERS:
+        table, upcoming, past = computed(metadata, owner, fk, rolled_at)
+        wrong = or_(table.c.upcoming_shows_count != upcoming, table.c.past_shows_count != past)
+        count = conn.execute(select(func.count()).select_from(table).where(wrong)).scalar()
+        sample = [(row[0], (row[1], row[2]), (row[3], row[4])) for row in conn.execute(
+            select(table.c.id, table.c.upcoming_shows_count, table.c.past_shows_count, upcoming, past)
+            .where(wrong).order_by(table.c.id).limit(limit))]
+        if repair and count:
+            conn.execute(table.update().where(wrong).values(upcoming_shows_count=upcoming, past_shows_count=past))
+        report[owner] = (count, sample)
+    return report
+
+
+def recount(conn, metadata, now=None):
+    """Recompute every counter at `now` and move the watermark there."""
+    now = now or datetime.now()
+    set_watermark(conn, metadata, now)
+    for owner, fk in OWNERS:
+        table, upcoming, past = computed(metadata, owner, fk, now)
+        conn.execute(table.update().values(upcoming_shows_count=upcoming, past_shows_count=past))
+
+
+def clear_page_cache():
+    page_cache = current_app.extensions.get('page_cache')
+    if page_cache is not None:
+        page_cache.invalidate('venues', 'artists', 'shows')
+
+
+@click.group('show-counts')
+def show_counts_command():
+    """Maintain the past/upcoming show counters."""
+
+
+@show_counts_command.command('roll')
+@with_appcontext
+def roll_command():
+    """Move shows that have started from upcoming to past."""
+    from models import db
+
+    with db.engine.begin() as conn:
+        moved = roll(conn, db.metadata)
+    click.echo('Rolled %d shows over to past' % moved)
+    if moved:
+        clear_page_cache()
+
+
+@show_counts_command.command('check')
+@click.option('--repair', is_flag=True, help='Rewrite the counters that drifted.')
+@with_appcontext
+def check_command(repair):
+    """Recompute the counters and report drift."""
+    from models import db
+
+    with db.engine.begin() as conn:
+        report = drift(conn, db.metadata, repair=repair)
+    drifted = 0
+    for owner, (count, sample) in report.items():
+        drifted += count
+        click.echo('%-7s %d rows %s' % (owner, count, 'repaired' if repair else 'drifted'))
+        for id, stored, actual in sample:
+            click.echo('  %s %d: stored %d upcoming / %d past, actual %d / %d' % (
+                owner, id, stored[0], stored[1], actual[0], actual[1]))
+    if repair and drifted:
+        clear_page_cache()
+    if drifted and not repair:
+        raise SystemExit(1)
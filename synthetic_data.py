@@ -0,0 +1,174 @@
+#----------------------------------------------------------------------------#
+# Synthetic venues, artists and shows at benchmark scale.
+#
+# Writes ';'-delimited CSVs in the same format as venue_data.csv,
+# artist_data.csv and show_data.csv, or loads the rows straight into the
+# configured database through the bulk import path. Output is deterministic
+# for a given --seed. Venue and artist popularity is skewed so a few detail
+# pages carry most of the shows, as on the real site; dates span two years
+# back and one year ahead so both past and upcoming sections are populated.
+#
+#   flask generate --scale 100k --out data/100k
+#   flask generate --scale 1m --load
+#----------------------------------------------------------------------------#
+
+import csv
+import os
+import random
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func, select
+
+import show_counts
+from models import db
+from read_data import load_rows, row_hash
+
+SCALES = {'1k': 1000, '100k': 100000, '1m': 1000000}
+SHOWS_PER_VENUE = 50
+SHOWS_PER_ARTIST = 20
+
+GENRES = ('Alternative', 'Blues', 'Classical', 'Country', 'Electronic', 'Folk', 'Funk',
+          'Hip-Hop', 'Heavy Metal', 'Instrumental', 'Jazz', 'Musical Theatre', 'Pop',
+          'Punk', 'R&B', 'Reggae', 'Rock n Roll', 'Soul', 'Swing', 'Other')
+CITIES = (('San Francisco', 'CA'), ('Los Angeles', 'CA'), ('San Diego', 'CA'),
+          ('New York', 'NY'), ('Brooklyn', 'NY'), ('Austin', 'TX'), ('Houston', 'TX'),
+          ('Chicago', 'IL'), ('Seattle', 'WA'), ('Portland', 'OR'), ('Denver', 'CO'),
+          ('Nashville', 'TN'), ('New Orleans', 'LA'), ('Miami', 'FL'), ('Boston', 'MA'))
+WORDS = ('Blue', 'Velvet', 'Hall', 'Room', 'Garden', 'Echo', 'Union', 'Lantern', 'Copper',
+         'Harbor', 'Night', 'Owl', 'Static', 'Fox', 'Silver', 'Wild', 'Tide', 'Cellar')
+IMAGE = ('https://images.unsplash.com/photo-1549213783-8284d0336c4f'
+         '?ixlib=rb-1.2.1&auto=format&fit=crop&w=300&q=80')
+
+PROFILE_FIELDS = ('id', 'name', 'genres', 'city', 'state', 'address', 'phone',
+                  'website_link', 'facebook_link', 'image_link', 'seeking_flag')
+SHOW_FIELDS = ('id', 'date', 'venue_id', 'artist_id')
+CSV_DATE_FORMAT = '%d.%m.%Y %H:%M'
+
+
+def scale_counts(shows):
+    """(venues, artists, shows) for a number of shows."""
+    return max(2, shows // SHOWS_PER_VENUE), max(2, shows // SHOWS_PER_ARTIST), shows
+
+
+def profiles(rng, count, kind):
+    for id in range(1, count + 1):
+        name = '%s %s %s %d' % (rng.choice(WORDS), rng.choice(WORDS), kind, id)
+        city, state = rng.choice(CITIES)
+        slug = name.lower().replace(' ', '')
+        yield {
+            'id': id,
+            'name': name,
+            'genres': ', '.join(rng.sample(GENRES, rng.randint(1, 3))),
+            'city': city,
+            'state': state,
+            'address': '%d %s Street' % (rng.randint(1, 9999), rng.choice(WORDS)),
+            'phone': '%03d-%03d-%04d' % (rng.randint(200, 999), rng.randint(0, 999), rng.randint(0, 9999)),
+            'website_link': 'https://www.%s.com' % slug,
+            'facebook_link': 'https://www.facebook.com/%s' % slug,
+            'image_link': IMAGE,
+            'seeking_flag': rng.random() < 0.3,
+        }
+
+
+def shows(rng, count, venues, artists, now=None):
+    # Minute precision, so a row hashes the same whether it came from the
+    # generator or a CSV round trip.
+    start = (now or datetime.now()).replace(second=0, microsecond=0) - timedelta(days=730)
+    minutes = 3 * 365 * 24 * 60
+    for id in range(1, count + 1):
+        yield {
+            'id': id,
+            'date': start + timedelta(minutes=rng.randrange(minutes)),
+            # Squaring skews towards low ids: a few busy venues and artists.
+            'venue_id': 1 + int(venues * rng.random() ** 2),
+            'artist_id': 1 + int(artists * rng.random() ** 2),
+        }
+
+
+def generate(count, seed=0, now=None):
+    """(name, fields, rows) for venues, artists and shows, in load order."""
+    venues, artists, _ = scale_counts(count)
+    return [
+        ('Venue', PROFILE_FIELDS, profiles(random.Random(seed), venues, 'Venues')),
+        ('Artist', PROFILE_FIELDS, profiles(random.Random(seed + 1), artists, 'Artists')),
+        ('Show', SHOW_FIELDS, shows(random.Random(seed + 2), count, venues, artists, now)),
+    ]
+
+
+def csv_value(value):
+    if isinstance(value, datetime):
+        return value.strftime(CSV_DATE_FORMAT)
+    return value
+
+
+def write_csv(path, fields, rows):
+    written = 0
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow([csv_value(row.get(field)) for field in fields])
+            written += 1
+    return written
+
+
+def batched(table, rows, batch_size):
+    # Same columns and hash as read_batches, so a later incremental import of
+    # the equivalent CSVs sees every row as unchanged.
+    batch = []
+    for row in rows:
+        row = dict((name, value) for name, value in row.items() if name in table.c)
+        row['import_hash'] = row_hash(row)
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+@click.command('generate')
+@click.option('--scale', type=click.Choice(sorted(SCALES)), default='1k', show_default=True,
+              help='Number of shows; venues and artists scale with it.')
+@click.option('--shows', 'count', type=int, help='Exact number of shows, overrides --scale.')
+@click.option('--seed', default=0, show_default=True)
+@click.option('--out', type=click.Path(file_okay=False), help='Directory to write the CSVs to.')
+@click.option('--load', is_flag=True, help='Load the rows into the configured database.')
+@click.option('--batch-size', default=5000, show_default=True, help='Rows per insert batch.')
+@with_appcontext
+def generate_command(scale, count, seed, out, load, batch_size):
+    """Generate synthetic venues, artists and shows."""
+    if not out and not load:
+        raise click.UsageError('pass --out DIR, --load or both')
+    count = count or SCALES[scale]
+    venues, artists, _ = scale_counts(count)
+    click.echo('Generating %d venues, %d artists and %d shows' % (venues, artists, count))
+    now = datetime.now()
+
+    if out:
+        os.makedirs(out, exist_ok=True)
+        for name, fields, rows in generate(count, seed, now):
+            path = os.path.join(out, '%s_data.csv' % name.lower())
+            click.echo('  %s: %d rows' % (path, write_csv(path, fields, rows)))
+
+    if load:
+        tables = db.metadata.tables
+        with db.engine.begin() as conn:
+            for name in ('Venue', 'Artist', 'Show'):
+                if conn.execute(select(func.count()).select_from(tables[name])).scalar():
+                    raise click.ClickException('%s is not empty; load into an empty database' % name)
+            for name, fields, rows in generate(count, seed, now):
+                loaded, elapsed = load_rows(conn, tables[name], batched(tables[name], rows, batch_size))
+                click.echo('Loaded %d %s rows in %.2fs' % (loaded, name, elapsed))
+            show_counts.recount(conn, db.metadata)
+        page_cache = current_app.extensions.get('page_cache')
+        if page_cache is not None:
+            page_cache.clear()
+
+
+if __name__ == '__main__':
+    from app import app
+    with app.app_context():
+        generate_command.main(standalone_mode=True)
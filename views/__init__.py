@@ -0,0 +1,10 @@
+#----------------------------------------------------------------------------#
+# Blueprints: pages per resource, the JSON API, and the home/error pages.
+#----------------------------------------------------------------------------#
+
+
+def register_blueprints(app):
+    from views import main, venues, artists, shows, api
+
+    for module in (main, venues, artists, shows, api):
+        app.register_blueprint(module.bp)
@@ -0,0 +1,84 @@
+#----------------------------------------------------------------------------#
+# JSON API.
+#
+# Read-only JSON views over the same query functions as the pages. Bodies
+# go through the page cache and carry a strong ETag, so a poll with a
+# matching If-None-Match is answered 304 from the cached body.
+#----------------------------------------------------------------------------#
+
+import functools
+import hashlib
+import json
+from flask import Blueprint, current_app, request
+
+from extensions import page_cache, replicas
+from models import Venue, Artist
+from queries import venue_areas, venue_detail, artist_listing, artist_detail, show_listing, search_records
+
+bp = Blueprint('api', __name__)
+
+def json_body(data):
+  return json.dumps(data, default=lambda o: o.isoformat(), separators=(',', ':'))
+
+def json_response(view):
+  @functools.wraps(view)
+  def wrapper(*args, **kwargs):
+    body = view(*args, **kwargs)
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(hashlib.md5(body.encode()).hexdigest())
+    return response.make_conditional(request)
+  return wrapper
+
+@bp.route('/api/v1/venues')
+@replicas.reads
+@json_response
+@page_cache.cached('venues')
+def api_venues():
+  areas, links = venue_areas(request.args.get('genre'))
+  return json_body({"areas": areas, **links})
+
+@bp.route('/api/v1/venues/search')
+@replicas.reads
+@json_response
+@page_cache.cached('venues', 'shows')
+def api_search_venues():
+  return json_body(search_records(Venue, request.args.get('search_term', ''),
+                                  genre=request.args.get('genre')))
+
+@bp.route('/api/v1/venues/<int:venue_id>')
+@replicas.reads
+@json_response
+@page_cache.cached('venue:{venue_id}')
+def api_venue(venue_id):
+  return json_body(venue_detail(venue_id))
+
+@bp.route('/api/v1/artists')
+@replicas.reads
+@json_response
+@page_cache.cached('artists')
+def api_artists():
+  data, links = artist_listing(request.args.get('genre'))
+  return json_body({"artists": data, **links})
+
+@bp.route('/api/v1/artists/search')
+@replicas.reads
+@json_response
+@page_cache.cached('artists', 'shows')
+def api_search_artists():
+  return json_body(search_records(Artist, request.args.get('search_term', ''),
+                                  genre=request.args.get('genre')))
+
+@bp.route('/api/v1/artists/<int:artist_id>')
+@replicas.reads
+@json_response
+@page_cache.cached('artist:{artist_id}')
+def api_artist(artist_id):
+  return json_body(artist_detail(artist_id))
+
+@bp.route('/api/v1/shows')
+@replicas.reads
+@json_response
+@page_cache.cached('shows')
+def api_shows():
+  data, links = show_listing()
+  return json_body({"shows": data, **links})
@@ -0,0 +1,125 @@
+#----------------------------------------------------------------------------#
+# Artist pages.
+#----------------------------------------------------------------------------#
+
+from flask import Blueprint, render_template, stream_template, request, flash, redirect, url_for, abort, jsonify
+
+from extensions import budget, page_cache, replicas
+from deletion import delete, log_progress
+from models import db, Artist
+from queries import stream_requested, artist_listing, artist_detail, search_records, genres_named
+
+bp = Blueprint('artists', __name__)
+
+
+@bp.route('/artists')
+@budget.declare(1)
+@replicas.reads
+@page_cache.cached('artists')
+def artists():
+  if stream_requested():
+    data, links = artist_listing(request.args.get('genre'), stream=True)
+    return stream_template('pages/artists.html', artists=data, page=links)
+  data, links = artist_listing(request.args.get('genre'))
+
+  return render_template('pages/artists.html', artists=data, page=links)
+
+@bp.route('/artists/search', methods=['POST'])
+@budget.declare(1)
+@replicas.reads
+def search_artists():
+
+  search_term = request.form.get('search_term', '')
+  genre = request.form.get('genre') or request.args.get('genre')
+  response = search_records(Artist, search_term, genre=genre)
+
+  return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''))
+
+@bp.route('/artists/<int:artist_id>')
+@budget.declare(4)
+@replicas.reads
+@page_cache.cached('artist:{artist_id}')
+def show_artist(artist_id):
+  data = artist_detail(artist_id)
+  return render_template('pages/show_artist.html', artist=data)
+
+@bp.route('/artists/<int:artist_id>', methods=['DELETE'])
+@budget.exempt
+def delete_artist(artist_id):
+  # Shows are deleted in batches, each in its own transaction (deletion.py).
+  result = delete('Artist', artist_id, progress=log_progress('artist', artist_id))
+  if result is None:
+    abort(404)
+  return jsonify(success=True, shows_deleted=result[0])
+
+#  Update
+#  ----------------------------------------------------------------
+@bp.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+  from forms import ArtistForm
+  form = ArtistForm()
+  artist={
+    "id": 4,
+    "name": "Guns N Petals",
+    "genres": ["Rock n Roll"],
+    "city": "San Francisco",
+    "state": "CA",
+    "phone": "326-123-5000",
+    "website": "https://www.gunsnpetalsband.com",
+    "facebook_link": "https://www.facebook.com/GunsNPetals",
+    "seeking_venue": True,
+    "seeking_description": "Looking for shows to perform at in the San Francisco Bay Area!",
+    "image_link": "https://images.unsplash.com/photo-1549213783-8284d0336c4f?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=300&q=80"
+  }
+  # TODO: populate form with fields from artist with ID <artist_id>
+  return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+@bp.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+  # TODO: take values from the form submitted, and update existing
+  # artist record with ID <artist_id> using the new attributes
+
+
+
+
+  return redirect(url_for('artists.show_artist', artist_id=artist_id))
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+@bp.route('/artists/create', methods=['GET'])
+def create_artist_form():
+  from forms import ArtistForm
+  form = ArtistForm()
+  return render_template('forms/new_artist.html', form=form)
+
+@bp.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+
+  try:
+    an_artist = Artist(
+      name = request.form['name'],
+      city = request.form['city'],
+      state = request.form['state'],
+      phone = request.form['phone'],
+      genres = genres_named(request.form.getlist('genres')),
+      genres_text = ", ".join(request.form.getlist('genres')),
+      facebook_link = request.form['facebook_link'],
+      seeking_flag = request.form['seeking_flag'] == "y",
+      seeking_description = request.form['seeking_description'],
+    )
+    
+    db.session.add(an_artist)
+    db.session.commit()   
+    page_cache.invalidate('artists')
+    # on successful db insert, flash success
+    flash('Artist ' + request.form['name'] + ' was successfully listed!')
+  except Exception as e:
+    print(e)
+    db.session.rollback()
+    flash('An error occurred. Artist ' + an_artist.name + ' could not be listed.')
+  finally:
+    db.session.close()
+
+  return render_template('pages/home.html')
+
@@ -0,0 +1,24 @@
+#----------------------------------------------------------------------------#
+# Home page and error pages.
+#----------------------------------------------------------------------------#
+
+from flask import Blueprint, render_template, request
+
+bp = Blueprint('main', __name__)
+
+
+@bp.route('/')
+def index():
+  return render_template('pages/home.html')
+
+@bp.app_errorhandler(404)
+def not_found_error(error):
+    if request.path.startswith('/api/'):
+        return {"error": "not found"}, 404
+    return render_template('errors/404.html'), 404
+
+@bp.app_errorhandler(500)
+def server_error(error):
+    if request.path.startswith('/api/'):
+        return {"error": "internal server error"}, 500
+    return render_template('errors/500.html'), 500
@@ -0,0 +1,61 @@
+#----------------------------------------------------------------------------#
+# Show pages.
+#----------------------------------------------------------------------------#
+
+from flask import Blueprint, render_template, stream_template, request, flash
+
+from extensions import budget, page_cache, replicas
+from models import db, Show
+from queries import stream_requested, show_listing
+
+bp = Blueprint('shows', __name__)
+
+
+@bp.route('/shows')
+@budget.declare(1)
+@replicas.reads
+@page_cache.cached('shows')
+def shows():
+  if stream_requested():
+    data, links = show_listing(stream=True)
+    return stream_template('pages/shows.html', shows=data, page=links)
+  data, links = show_listing()
+
+  return render_template('pages/shows.html', shows=data, page=links)
+
+@bp.route('/shows/create')
+def create_shows():
+  # renders form. do not touch.
+  from forms import ShowForm
+  form = ShowForm()
+  return render_template('forms/new_show.html', form=form)
+
+@bp.route('/shows/create', methods=['POST'])
+def create_show_submission():
+  import dateutil.parser
+
+  try:
+    a_show = Show(
+      venue_id = request.form['venue_id'],
+      artist_id = request.form['artist_id'],
+      date = dateutil.parser.parse(request.form['start_time']),
+    )
+    
+    db.session.add(a_show)
+    db.session.commit()   
+    page_cache.invalidate(
+      'shows',
+      'venues',
+      'venue:%s' % a_show.venue_id,
+      'artist:%s' % a_show.artist_id,
+    )
+    # on successful db insert, flash success
+    flash('Show was successfully listed!')
+  except Exception as e:
+    print(e)
+    db.session.rollback()
+    flash('An error occurred. Show could not be listed.')
+  finally:
+    db.session.close()
+
+  return render_template('pages/home.html')
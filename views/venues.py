@@ -0,0 +1,125 @@
+#----------------------------------------------------------------------------#
+# Venue pages.
+#----------------------------------------------------------------------------#
+
+from flask import Blueprint, render_template, stream_template, request, flash, redirect, url_for, abort, jsonify
+
+from extensions import budget, page_cache, replicas
+from deletion import delete, log_progress
+from models import db, Venue
+from queries import stream_requested, venue_areas, venue_detail, search_records, genres_named
+
+bp = Blueprint('venues', __name__)
+
+
+@bp.route('/venues')
+@budget.declare(1)
+@replicas.reads
+@page_cache.cached('venues')
+def venues():
+  if stream_requested():
+    areas, links = venue_areas(request.args.get('genre'), stream=True)
+    return stream_template('pages/venues.html', areas=areas, page=links)
+  areas, links = venue_areas(request.args.get('genre'))
+  return render_template('pages/venues.html', areas=areas, page=links)
+
+@bp.route('/venues/search', methods=['POST'])
+@budget.declare(1)
+@replicas.reads
+def search_venues():
+  search_term = request.form.get('search_term', '')
+  genre = request.form.get('genre') or request.args.get('genre')
+  response = search_records(Venue, search_term, genre=genre)
+
+  return render_template('pages/search_venues.html', results=response, search_term=request.form.get('search_term', ''))
+
+
+
+@bp.route('/venues/<int:venue_id>')
+@budget.declare(4)
+@replicas.reads
+@page_cache.cached('venue:{venue_id}')
+def show_venue(venue_id):
+  data = venue_detail(venue_id)
+  return render_template('pages/show_venue.html', venue=data)
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/create', methods=['GET'])
+def create_venue_form():
+  from forms import VenueForm
+  form = VenueForm()
+  return render_template('forms/new_venue.html', form=form)
+
+@bp.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+
+  try:
+    a_venue = Venue(
+      name = request.form['name'],
+      city = request.form['city'],
+      state = request.form['state'],
+      address = request.form['address'],
+      phone = request.form['phone'],
+      genres = genres_named(request.form.getlist('genres')),
+      genres_text = ", ".join(request.form.getlist('genres')),
+      facebook_link = request.form['facebook_link'],
+      seeking_flag = request.form['seeking_flag'] == "y",
+      seeking_description = request.form['seeking_description'],
+    )
+    
+    db.session.add(a_venue)
+    db.session.commit()   
+    page_cache.invalidate('venues')
+    # on successful db insert, flash success
+    flash('Venue ' + request.form['name'] + ' was successfully listed!')
+  except Exception as e:
+    print(e)
+    db.session.rollback()
+    flash('An error occurred. Venue ' + a_venue.name + ' could not be listed.')
+  finally:
+    db.session.close()
+
+  return render_template('pages/home.html')
+
+@bp.route('/venues/<int:venue_id>', methods=['DELETE'])
+@budget.exempt
+def delete_venue(venue_id):
+  # Shows are deleted in batches, each in its own transaction (deletion.py).
+  result = delete('Venue', venue_id, progress=log_progress('venue', venue_id))
+  if result is None:
+    abort(404)
+
+  # BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
+  # clicking that button delete it from the db then redirect the user to the homepage
+  return jsonify(success=True, shows_deleted=result[0])
+
+#  Update
+#  ----------------------------------------------------------------
+@bp.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+  from forms import VenueForm
+  form = VenueForm()
+  venue={
+    "id": 1,
+    "name": "The Musical Hop",
+    "genres": ["Jazz", "Reggae", "Swing", "Classical", "Folk"],
+    "address": "1015 Folsom Street",
+    "city": "San Francisco",
+    "state": "CA",
+    "phone": "123-123-1234",
+    "website": "https://www.themusicalhop.com",
+    "facebook_link": "https://www.facebook.com/TheMusicalHop",
+    "seeking_talent": True,
+    "seeking_description": "We are on the lookout for a local artist to play every two weeks. Please call us.",
+    "image_link": "https://images.unsplash.com/photo-1543900694-133f37abaaa5?ixlib=rb-1.2.1&ixid=eyJhcHBfaWQiOjEyMDd9&auto=format&fit=crop&w=400&q=60"
+  }
+  # TODO: populate form with values from venue with ID <venue_id>
+  return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+  # TODO: take values from the form submitted, and update existing
+  # venue record with ID <venue_id> using the new attributes
+  return redirect(url_for('venues.show_venue', venue_id=venue_id))
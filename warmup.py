@@ -0,0 +1,132 @@
+#----------------------------------------------------------------------------#
+# Cache warming.
+#
+# Compiles every template, then renders the hottest pages once: the venue,
+# artist and show listings (pages and JSON) and the detail pages of the
+# WARM_CACHE_TOP venues and artists with the most shows. That fills the page
+# cache and the database's buffer cache before the first users arrive.
+#
+# - `flask warm-cache` warms on demand, in process (useful with a shared
+#   PAGE_CACHE_BACKEND), or with --url through a running deployment.
+# - With WARM_CACHE_ON_START, every gunicorn worker (gunicorn.conf.py) and
+#   the ASGI app (asgi.py) warm themselves before serving.
+#----------------------------------------------------------------------------#
+
+import time
+import urllib.error
+import urllib.request
+import click
+from flask import current_app, url_for
+from flask.cli import with_appcontext
+from sqlalchemy import select
+
+LISTINGS = (
+    'main.index', 'venues.venues', 'artists.artists', 'shows.shows',
+    'api.api_venues', 'api.api_artists', 'api.api_shows',
+)
+DETAILS = (
+    ('Venue', ('venues.show_venue', 'api.api_venue'), 'venue_id'),
+    ('Artist', ('artists.show_artist', 'api.api_artist'), 'artist_id'),
+)
+
+
+def hot_paths(top):
+    """Listing paths plus the detail paths of the `top` busiest venues and artists.
+
+    Needs a request context, for url_for.
+    """
+    from models import db
+
+    paths = [url_for(endpoint) for endpoint in LISTINGS]
+    for name, endpoints, arg in DETAILS:
+        table = db.metadata.tables[name]
+        ids = db.session.execute(
+            select(table.c.id)
+            .order_by((table.c.upcoming_shows_count + table.c.past_shows_count).desc(), table.c.id)
+            .limit(top)).scalars().all()
+        paths.extend(url_for(endpoint, **{arg: id}) for id in ids for endpoint in endpoints)
+    return paths
+
+
+def prime_templates(app):
+    # Compiled templates stay in the Jinja environment's cache (and in its
+    # bytecode cache, when JINJA_BYTECODE_CACHE_DIR is set).
+    names = app.jinja_env.list_templates(extensions=['html'])
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names
+
+
+def local_fetch(app):
+    client = app.test_client()
+    return lambda path: client.get(path).status_code
+
+
+def http_fetch(base_url):
+    def fetch(path):
+        try:
+            with urllib.request.urlopen(base_url.rstrip('/') + path, timeout=30) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+    return fetch
+
+
+def warm(app, top=None, fetch=None):
+    """Warm `app`; returns (templates, [(path, status, seconds)], total seconds).
+
+    Pages are requested through `fetch(path) -> status`, by default the
+    app's test client, which also compiles the templates first.
+    """
+    started = time.perf_counter()
+    top = app.config.get('WARM_CACHE_TOP', 20) if top is None else top
+    templates = []
+    if fetch is None:
+        templates = prime_templates(app)
+        fetch = local_fetch(app)
+    with app.test_request_context():
+        paths = hot_paths(top)
+    pages = []
+    for path in paths:
+        page_started = time.perf_counter()
+        status = fetch(path)
+        pages.append((path, status, time.perf_counter() - page_started))
+    return templates, pages, time.perf_counter() - started
+
+
+def warm_on_start(app):
+    # Startup hook: warming must never keep a worker from serving.
+    if not app.config.get('WARM_CACHE_ON_START'):
+        return
+    try:
+        templates, pages, elapsed = warm(app)
+    except Exception:
+        app.logger.exception('Cache warming failed')
+        return
+    failed = sum(1 for path, status, seconds in pages if status != 200)
+    app.logger.info('Warmed %d pages (%d failed) and %d templates in %.2fs',
+                    len(pages), failed, len(templates), elapsed)
+
+
+@click.command('warm-cache')
+@click.option('--top', type=int, default=None,
+              help='Busiest venues and artists to render (default WARM_CACHE_TOP).')
+@click.option('--url', default=None, help='Warm a running server at this base URL instead.')
+@with_appcontext
+def warm_cache_command(top, url):
+    """Pre-render the hottest pages into the page cache."""
+    app = current_app._get_current_object()
+    page_cache = app.extensions.get('page_cache')
+    if url is None and page_cache is not None and page_cache.enabled and \
+            type(page_cache.backend).__name__ == 'MemoryBackend':
+        click.echo('Note: the page cache is in-process; pages cached here are not seen '
+                   'by the server. Use a shared PAGE_CACHE_BACKEND or --url.')
+    templates, pages, elapsed = warm(app, top, http_fetch(url) if url else None)
+    for path, status, seconds in pages:
+        click.echo('%3d %8.1f ms  %s' % (status, seconds * 1e3, path))
+    failed = sum(1 for path, status, seconds in pages if status != 200)
+    click.echo('Warmed %d pages (%d failed) and %d templates in %.2fs' % (
+        len(pages), failed, len(templates), elapsed))
+    if failed:
+        raise SystemExit(1)